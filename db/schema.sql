@@ -27,6 +27,9 @@ CREATE TABLE IF NOT EXISTS fact_readings (
     value       REAL,                              -- keep nullable; policy is "don’t overwrite non-NULL with NULL"
     source      TEXT,                              -- propagate source / lineage
     ingested_at TEXT    NOT NULL,                  -- set by app on upsert
+    -- ts_utc as unix epoch seconds, derived (writers never set it): integer range
+    -- scans for the read path. Added to older DBs by init_db's migration.
+    ts_epoch    INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', ts_utc) AS INTEGER)) VIRTUAL,
     UNIQUE (ts_utc, metric_id, region_id)          -- idempotent key
 );
 
@@ -55,3 +58,8 @@ CREATE TABLE IF NOT EXISTS fact_forecasts (
 -- Query performance helpers
 CREATE INDEX IF NOT EXISTS ix_fact_ts         ON fact_readings (ts_utc);
 CREATE INDEX IF NOT EXISTS ix_fact_metric_ts  ON fact_readings (metric_id, ts_utc);
+CREATE INDEX IF NOT EXISTS ix_fact_metric_epoch ON fact_readings (metric_id, ts_epoch);
+-- Staging day windows (coverage counts + last-write-wins ROW_NUMBER): range on
+-- ts_utc, then rows already grouped by metric/region, newest ingested_at first
+CREATE INDEX IF NOT EXISTS ix_stg_window
+    ON stg_readings (ts_utc, metric_code, region_code, ingested_at DESC);
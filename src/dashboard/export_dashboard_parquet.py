@@ -4,6 +4,10 @@ export_dashboard_parquet.py
 Exports the SQLite analytics view `vw_forecast_vs_actual_all`
 to a Power BI–friendly Parquet file.
 
+Reads go through `mat_forecast_vs_actual_all`, the materialized copy of the
+view maintained by ingest.init_views (refreshed before export by default;
+daily_forecast_runner, which has just refreshed it, skips that).
+
 This view already contains:
   - forecast_date
   - ts_utc (15-min UTC timestamp)
@@ -23,9 +27,13 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from pathlib import Path
+import sqlite3
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
+from ingest.init_views import refresh_materialized_views
 from ingest.promote import get_conn
 
 
@@ -33,16 +41,89 @@ from ingest.promote import get_conn
 INIT_PATH = Path(__file__)
 PROJECT_ROOT = INIT_PATH.resolve().parents[2]
 
+# Rows pulled from SQLite per Arrow record batch / Parquet write
+FETCH_BATCH_ROWS = 50_000
+
+# Low-cardinality text columns: stored as Arrow dictionaries and the only
+# columns Parquet dictionary-encodes (floats/timestamps use plain encoding)
+DICTIONARY_COLUMNS = ["metric_code", "region_code", "model_name", "generated_at_utc"]
+
+# MW columns are exported as float32 (ample precision for MW telemetry)
+MW_COLUMNS = ["forecast_mw", "actual_mw", "error_mw", "abs_error_mw"]
+
+# Arrow schema of the exported dataset (column order = SELECT order + metadata)
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("forecast_date", pa.date32()),
+        ("ts_utc", pa.timestamp("ns", tz="UTC")),
+        ("metric_code", pa.dictionary(pa.int32(), pa.string())),
+        ("region_code", pa.dictionary(pa.int32(), pa.string())),
+        ("model_name", pa.dictionary(pa.int32(), pa.string())),
+        ("train_days", pa.int16()),
+        ("forecast_mw", pa.float32()),
+        ("actual_mw", pa.float32()),
+        ("error_mw", pa.float32()),
+        ("abs_error_mw", pa.float32()),
+        ("generated_at_utc", pa.dictionary(pa.int32(), pa.string())),
+    ]
+)
+
+
+def _rows_to_record_batch(rows: list[tuple], generated_at_utc: str) -> pa.RecordBatch:
+    """
+    Convert a chunk of SQLite row tuples into an Arrow RecordBatch matching EXPORT_SCHEMA.
+
+    ts_utc is parsed from the stored ISO-8601 text; unparsable values become null.
+    forecast_date ('YYYY-MM-DD' text) becomes a date32 so BI tools see a real date.
+    train_days is narrowed to int16 (raises if out of range).
+    """
+    columns = list(zip(*rows))
+    arrays: list[pa.Array] = []
+
+    for i, field in enumerate(EXPORT_SCHEMA):
+        if field.name == "generated_at_utc":
+            arrays.append(
+                pa.DictionaryArray.from_arrays(
+                    pa.array([0] * len(rows), type=pa.int32()),
+                    pa.array([generated_at_utc], type=pa.string()),
+                )
+            )
+        elif field.name == "ts_utc":
+            ts = pc.strptime(
+                pa.array(columns[i], type=pa.string()),
+                format="%Y-%m-%dT%H:%M:%SZ",
+                unit="s",
+                error_is_null=True,
+            )
+            arrays.append(pc.cast(ts, field.type))
+        elif field.name == "forecast_date":
+            arrays.append(pc.cast(pa.array(columns[i], type=pa.string()), field.type))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(columns[i], type=pa.string()).dictionary_encode())
+        elif field.name in MW_COLUMNS:
+            values = pa.array(columns[i], type=field.type)
+            if pc.all(pc.is_finite(values)).as_py() is False:
+                raise ValueError(f"Column {field.name!r} has values outside float32 range.")
+            arrays.append(values)
+        else:
+            arrays.append(pa.array(columns[i], type=field.type))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=EXPORT_SCHEMA)
+
 
 def export_demand_forecast_vs_actual_parquet(
     out_path: str | None = None,
     region_code: str = "ALL",
     prefer_model_name: str | None = None,
     max_forecast_dates: int | None = None,
+    refresh: bool = True,
 ) -> dict:
     """
     Export demand forecast vs actual dataset from vw_forecast_vs_actual_all.
 
+    Rows are streamed from SQLite in chunks of FETCH_BATCH_ROWS and written
+    batch-by-batch with a ParquetWriter, so the full view is never held in memory.
+
     Parameters
     ----------
     out_path : str | None
@@ -54,6 +135,10 @@ def export_demand_forecast_vs_actual_parquet(
         Optional filter (e.g. "prophet_v1").
     max_forecast_dates : int | None
         Optional limit on most recent forecast dates.
+    refresh : bool
+        Rebuild mat_forecast_vs_actual_all before reading (default True).
+        Pass False only when the snapshot was just refreshed (otherwise the
+        export can miss recently stored forecasts / readings).
     """
 
     # Default output path
@@ -62,8 +147,47 @@ def export_demand_forecast_vs_actual_parquet(
         out_dir.mkdir(parents=True, exist_ok=True)
         out_path = str(out_dir / "demand_forecast_vs_actual.parquet")
 
+    # Metadata
+    generated_at_utc = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    rows_written = 0
+    writer: pq.ParquetWriter | None = None
+
     with get_conn() as conn:
-        sql = """
+        if refresh:
+            refresh_materialized_views(conn)
+
+        where = """
+            WHERE metric_code = 'demand_actual'
+              AND region_code = ?
+        """
+        params: list = [region_code]
+
+        if prefer_model_name:
+            where += " AND model_name = ?"
+            params.append(prefer_model_name)
+
+        # Limit forecast dates if requested (resolved in SQL so ix_mat_fva_export
+        # serves the subquery)
+        if max_forecast_dates is not None:
+            subquery = """
+                SELECT forecast_date
+                FROM mat_forecast_vs_actual_all
+                WHERE metric_code = 'demand_actual'
+                  AND region_code = ?
+            """
+            sub_params: list = [region_code]
+            if prefer_model_name:
+                subquery += " AND model_name = ?"
+                sub_params.append(prefer_model_name)
+            subquery += " GROUP BY forecast_date ORDER BY forecast_date DESC LIMIT ?"
+            sub_params.append(int(max_forecast_dates))
+
+            where += f" AND forecast_date IN ({subquery})"
+            params.extend(sub_params)
+
+        # Sort in SQL for BI friendliness (no in-memory sort needed)
+        sql = f"""
             SELECT
                 forecast_date,
                 ts_utc,
@@ -75,45 +199,68 @@ def export_demand_forecast_vs_actual_parquet(
                 actual_mw,
                 error_mw,
                 abs_error_mw
-            FROM vw_forecast_vs_actual_all
-            WHERE metric_code = 'demand_actual'
-              AND region_code = ?
+            FROM mat_forecast_vs_actual_all
+            {where}
+            ORDER BY forecast_date, ts_utc, model_name, train_days
         """
-        params = [region_code]
-
-        if prefer_model_name:
-            sql += " AND model_name = ?"
-            params.append(prefer_model_name)
-
-        df = pd.read_sql(sql, conn, params=params)
 
-    if df.empty:
-        raise ValueError("vw_forecast_vs_actual_all returned no rows.")
+        cur = conn.cursor()
+        cur.arraysize = FETCH_BATCH_ROWS  # fetchmany() default chunk
+        try:
+            cur.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            raise RuntimeError(
+                "mat_forecast_vs_actual_all does not exist yet. Run "
+                "`python -m ingest.init_views` (or call with refresh=True) to build it."
+            ) from e
+        try:
+            while rows := cur.fetchmany():
+                batch = _rows_to_record_batch(rows, generated_at_utc)
 
-    # Limit forecast dates if requested
-    df["forecast_date"] = df["forecast_date"].astype(str)
-    if max_forecast_dates is not None:
-        keep = sorted(df["forecast_date"].unique())[-int(max_forecast_dates):]
-        df = df[df["forecast_date"].isin(keep)].copy()
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        out_path,
+                        EXPORT_SCHEMA,
+                        compression="zstd",
+                        compression_level=3,
+                        use_dictionary=DICTIONARY_COLUMNS,
+                        data_page_size=1 << 20,
+                    )
+                writer.write_batch(batch)
 
-    # Normalize timestamp
-    df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True, errors="coerce")
-
-    # Metadata
-    df["generated_at_utc"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                rows_written += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
 
-    # Sort for BI friendliness
-    df = df.sort_values(
-        ["forecast_date", "ts_utc", "model_name", "train_days"]
-    ).reset_index(drop=True)
+        # Summary lists come from DISTINCT queries on the same snapshot (same
+        # filters, index-served) instead of scanning batches
+        forecast_dates = [
+            r[0] for r in conn.execute(
+                f"SELECT DISTINCT forecast_date FROM mat_forecast_vs_actual_all {where} ORDER BY forecast_date",
+                params,
+            )
+        ]
+        models = [
+            r[0] for r in conn.execute(
+                f"SELECT DISTINCT model_name FROM mat_forecast_vs_actual_all {where} ORDER BY model_name",
+                params,
+            )
+        ]
 
-    df.to_parquet(out_path, index=False)
+    if rows_written == 0:
+        raise ValueError(
+            "mat_forecast_vs_actual_all returned no rows "
+            "(no stored forecasts yet, or the snapshot needs a refresh)."
+        )
 
     summary = {
-        "rows": int(len(df)),
+        "rows": int(rows_written),
         "out_path": out_path,
-        "forecast_dates": sorted(df["forecast_date"].unique().tolist()),
-        "models": sorted(df["model_name"].unique().tolist()),
+        "forecast_dates": forecast_dates,
+        "models": models,
         "region_code": region_code,
     }
 
@@ -129,6 +276,7 @@ def main() -> None:
         region_code="ALL",
         prefer_model_name=None,     # set to "prophet_v1" if desired
         max_forecast_dates=None,    # e.g. 30 if you want rolling window
+        refresh=True,
     )
 
 
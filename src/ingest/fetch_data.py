@@ -1,15 +1,24 @@
 # === Imports ===
 import os
 import time
-import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-from datetime import datetime, date, timedelta
-from zoneinfo import ZoneInfo
+import pyarrow as pa
+import pyarrow.compute as pc
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from ingest.stage import stage_readings
 from dotenv import load_dotenv  # <-- new import
 
+logger = logging.getLogger(__name__)
+
 # === Load environment variables ===
 load_dotenv()  # Reads .env file so os.getenv() can access its values
 
@@ -26,7 +35,13 @@ DEFAULT_CHART_TYPE = "default"
 DEFAULT_DATERANGE = "day"
 REQUEST_TIMEOUT_S = 15
 MAX_RETRIES = 3
-BACKOFF_S = [1, 2, 4]   # len must be >= MAX_RETRIES
+RETRY_BACKOFF_FACTOR = 1        # urllib3 exponential backoff between retries (s)
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+RATE_LIMIT_STATUS = 429         # handled in request_with_retry (pauses the shared bucket)
+
+# Multi-day fetch concurrency / politeness
+FETCH_MAX_WORKERS = 4
+MAX_REQUESTS_PER_S = 2.0   # token bucket shared by every request_with_retry call
 
 # Headers
 DEFAULT_HEADERS = {"User-Agent": USER_AGENT}
@@ -51,13 +66,80 @@ FIELDNAME_TO_METRIC = {
 # Default areas to request
 DEFAULT_AREAS = ["windactual", "solaractual", "demandactual"]
 
+# Raw API columns (order kept by parse_json_to_raw_df)
+RAW_COLUMNS = ["Value", "Region", "EffectiveTime", "FieldName"]
+RAW_SCHEMA = pa.schema([
+    ("Value", pa.float64()),
+    ("Region", pa.string()),
+    ("EffectiveTime", pa.string()),
+    ("FieldName", pa.string()),
+])
+
+# Lookup arrays for the vectorised FieldName → metric remap
+_FIELDNAMES = pa.array(list(FIELDNAME_TO_METRIC.keys()))
+_FIELDNAME_METRICS = pa.array(list(FIELDNAME_TO_METRIC.values()))
+
 # === Sanity / guardrail checks ===
 if not BASE_URL:
     raise RuntimeError("EIRGRID_BASE_URL is missing. Set it in your .env file.")
 if not USER_AGENT:
     raise RuntimeError("USER_AGENT is missing. Set it in your .env file.")
-if len(BACKOFF_S) < MAX_RETRIES:
-    raise RuntimeError("BACKOFF_S must have at least MAX_RETRIES entries.")
+
+# === Shared HTTP session (keep-alive + urllib3-level retry/backoff on 5xx) ===
+SESSION = requests.Session()
+SESSION.headers.update(DEFAULT_HEADERS)
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET"],
+        raise_on_status=False,  # hand the final response back so we can report it
+    ),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# === Request rate limiting ===
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at `rate` tokens/s up to `capacity`.
+
+    acquire() takes one token, sleeping only when the bucket is empty, so a
+    healthy server is never waited on needlessly. pause() drains the bucket
+    for a server-requested Retry-After, which delays every caller.
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        # Reserve the token under the lock (tokens may go negative = queued
+        # callers), then sleep off the deficit outside it
+        with self.lock:
+            self._refill()
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+BUCKET = TokenBucket(MAX_REQUESTS_PER_S)
 
 # === Optional one-time sanity prints ===
 # print("BASE_URL:", BASE_URL)
@@ -104,49 +186,74 @@ def request_with_retry(params):
     elif not isinstance(params["areas"], str):
         raise ValueError("'areas' must be a comma-separated string or a list of strings")
 
-    print(f"[debug] calling with params: {params}")  # (ok for now while learning)
+    logger.debug("calling with params: %s", params)
 
-    for attempt in range(MAX_RETRIES):
-        response = requests.get(
+    # Retries/backoff on 5xx happen inside the session's urllib3 adapter;
+    # 429s are retried here so the Retry-After pause applies to all workers
+    for attempt in range(MAX_RETRIES + 1):
+        BUCKET.acquire()
+        response = SESSION.get(
             BASE_URL,
             params=params,
-            headers=DEFAULT_HEADERS,
             timeout=REQUEST_TIMEOUT_S,
         )
 
-        if response.status_code == 200:
-            # Return the full Response so later steps can read .json(), .url, etc.
-            return response
+        if response.status_code != RATE_LIMIT_STATUS or attempt == MAX_RETRIES:
+            break
 
-        if 500 <= response.status_code <= 599:
-            wait = BACKOFF_S[attempt]
-            print(f"[debug] server {response.status_code}; retrying in {wait}s...")
-            time.sleep(wait)
-            continue
+        delay = _retry_after_seconds(response)
+        if delay is None:
+            delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+        logger.warning("HTTP 429; backing off %.1fs (attempt %d/%d)", delay, attempt + 1, MAX_RETRIES)
+        BUCKET.pause(delay)
 
-        # 4xx or other unexpected codes → fail fast with context
+    if response.status_code == 200:
+        # Return the full Response so later steps can read .content, .url, etc.
+        return response
+
+    if response.status_code == RATE_LIMIT_STATUS or 500 <= response.status_code <= 599:
         raise RuntimeError(
-            f"HTTP {response.status_code} (won't retry). "
+            f"HTTP {response.status_code} after {MAX_RETRIES} retries. "
             f"URL={response.url} BodyHead={response.text[:200]!r}"
         )
 
-    # If we ever exit the loop without returning, raise explicitly
-    raise RuntimeError("Exhausted retries without success.")
+    # 4xx or other unexpected codes → fail fast with context
+    raise RuntimeError(
+        f"HTTP {response.status_code} (won't retry). "
+        f"URL={response.url} BodyHead={response.text[:200]!r}"
+    )
+
+def _retry_after_seconds(response):
+    # Retry-After is either delta-seconds or an HTTP date; None if absent/unparseable
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 def parse_json_to_raw_df(response):
     # ---- Input validation ----
-    if not hasattr(response, "status_code") or not hasattr(response, "json"):
-        raise ValueError("Expected a response-like object with .status_code and .json().")
+    if not hasattr(response, "status_code") or not hasattr(response, "content"):
+        raise ValueError("Expected a response-like object with .status_code and .content.")
 
     if response.status_code != 200:
         url = getattr(response, "url", "<no url>")
         snippet = getattr(response, "text", "")[:200]
         raise RuntimeError(f"Expected 200, got {response.status_code}. URL={url} BodyHead={snippet!r}")
 
-    # ---- Parse JSON safely ----
+    # ---- Parse JSON safely (orjson parses the raw bytes in C) ----
     try:
-        data = response.json()
-    except Exception as e:
+        data = orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
         snippet = response.text[:200]
         url = getattr(response, "url", "<no url>")
         raise ValueError(f"Invalid JSON. URL={url} BodyHead={snippet!r} Error={e}")
@@ -161,65 +268,83 @@ def parse_json_to_raw_df(response):
     if not isinstance(data["Rows"], list):
         raise ValueError(f"'Rows' must be a list, not type: {type(data['Rows'])}")
 
-    # Empty day → return well-shaped empty frame
+    # Empty day → return well-shaped empty table
     if len(data["Rows"]) == 0:
-        return pd.DataFrame(columns=["Value", "Region", "EffectiveTime", "FieldName"])
+        return RAW_SCHEMA.empty_table()
 
-    # ---- Build raw DF ----
-    df_raw = pd.DataFrame(data["Rows"])
+    # ---- Build raw Arrow table (rows → columns in C; JSON null → null) ----
+    rows = data["Rows"]
+    try:
+        raw = pa.Table.from_pylist(rows)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed per-row types (e.g. numeric + string Value) → slow generic path
+        df_raw = pd.DataFrame(rows)
+        if "Value" in df_raw.columns:
+            df_raw["Value"] = pd.to_numeric(df_raw["Value"], errors="coerce")
+        raw = pa.Table.from_pandas(df_raw, preserve_index=False)
 
     # ---- Required columns present ----
-    required = {"Value", "Region", "EffectiveTime", "FieldName"}
-    missing = required - set(df_raw.columns)
+    missing = set(RAW_COLUMNS) - set(raw.column_names)
     if missing:
-        raise ValueError(f"Missing columns: {sorted(missing)}; got={df_raw.columns.tolist()}")
+        raise ValueError(f"Missing columns: {sorted(missing)}; got={raw.column_names}")
 
     # ---- Gentle dtype nudge (still raw) ----
-    df_raw["Value"] = pd.to_numeric(df_raw["Value"], errors="coerce")
+    raw = raw.select(RAW_COLUMNS)
 
-    return df_raw
+    # Value can arrive as text (numbers as strings, "-", "N/A"): as with the
+    # fallback above, anything non-numeric becomes null instead of failing the cast
+    value = raw.column("Value")
+    if not (pa.types.is_floating(value.type) or pa.types.is_integer(value.type)):
+        coerced = pd.to_numeric(value.to_pandas(), errors="coerce")
+        raw = raw.set_column(RAW_COLUMNS.index("Value"), "Value", pa.array(coerced, type=pa.float64()))
 
-def tidy_raw_df(df_raw, local_tz=LOCAL_TZ):
-    df_tidy = df_raw.rename(columns=
-                            {"Value":"value",
-                             "Region":"region",
-                             "EffectiveTime":"ts_local_str",
-                             "FieldName":"metric"})
+    return raw.cast(RAW_SCHEMA)
 
-    print("DEBUG unique FieldName/metric values:", sorted(df_tidy["metric"].unique()))
+def tidy_raw_df(raw, local_tz=LOCAL_TZ):
+    # Arrow table in → Arrow table out; every step below is a pyarrow.compute
+    # kernel over whole columns (no per-op frame copies)
+    raw = raw.select(RAW_COLUMNS).rename_columns(["value", "region", "ts_local_str", "metric"])
 
-    unexpected = set(df_tidy["metric"]) - set(FIELDNAME_TO_METRIC.keys())
+    # Check the few distinct FieldNames rather than every row
+    unexpected = set(pc.unique(raw["metric"]).drop_null().to_pylist()) - set(FIELDNAME_TO_METRIC.keys())
 
     if unexpected:
         raise ValueError(f"Unexpected metric: {unexpected}")
 
-    df_tidy["metric"] = df_tidy["metric"].replace(FIELDNAME_TO_METRIC)
-
-    df_tidy["unit"] = "MW"
-
-    df_tidy["ts_local_naive"] = pd.to_datetime(df_tidy["ts_local_str"]
-                   , format=EFFECTIVE_TIME_FMT
-                   , errors="raise")
-    df_tidy["ts_local"] = (df_tidy["ts_local_naive"]
-                           .dt.tz_localize(ZoneInfo(local_tz)
-                            ,nonexistent= "shift_forward"
-                            , ambiguous= "NaT"))
-    df_tidy["ts_utc"] = df_tidy["ts_local"].dt.tz_convert("UTC")
-
-    df_tidy = (
-        df_tidy[["ts_utc", "metric", "value", "unit", "region", "ts_local"]]
-        .sort_values("ts_utc")
-        .reset_index(drop=True)
+    metric = pc.take(_FIELDNAME_METRICS, pc.index_in(raw["metric"], value_set=_FIELDNAMES))
+
+    # Parse local wall-clock strings, then localize + convert to UTC.
+    # Ambiguous (autumn fall-back) times → null: they are localized both ways
+    # and nulled where the two readings disagree. Nonexistent (spring-forward)
+    # times shift forward to the first valid instant.
+    ts_local_naive = pc.strptime(raw["ts_local_str"], format=EFFECTIVE_TIME_FMT, unit="s")
+    ts_earliest = pc.assume_timezone(ts_local_naive, timezone=local_tz,
+                                     ambiguous="earliest", nonexistent="latest")
+    ts_latest = pc.assume_timezone(ts_local_naive, timezone=local_tz,
+                                   ambiguous="latest", nonexistent="latest")
+    ts_utc = pc.cast(
+        pc.if_else(pc.equal(ts_earliest, ts_latest), ts_earliest, pa.scalar(None, ts_earliest.type)),
+        pa.timestamp("s", tz="UTC"),
     )
 
-    df_tidy = df_tidy.drop(columns=["ts_local_str", "ts_local_naive"], errors="ignore")
-
-    print("cadence:\n", df_tidy["ts_utc"].diff().value_counts().head())
-    print("dupes:", df_tidy.duplicated(subset=["ts_utc", "metric"]).sum())
-    print("nulls (value):", df_tidy["value"].isna().sum())
-    print("dtypes:\n", df_tidy.dtypes)
-
-    return df_tidy
+    tidy = pa.table({
+        "ts_utc": ts_utc,
+        "metric": metric,
+        "value":  raw["value"],
+        "unit":   pa.repeat("MW", len(raw)),
+        "region": raw["region"],
+    }).sort_by("ts_utc")
+
+    # Diagnostics are full-table scans; only pay for them when DEBUG logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        ts = tidy["ts_utc"]
+        logger.debug("unique metric values: %s", sorted(pc.unique(tidy["metric"]).drop_null().to_pylist()))
+        logger.debug("cadence: %s", pc.value_counts(pc.subtract(ts.slice(1), ts.slice(0, len(ts) - 1))).to_pylist()[:5])
+        logger.debug("dupes: %s", len(tidy) - len(tidy.group_by(["ts_utc", "metric"]).aggregate([])))
+        logger.debug("nulls (value): %s", tidy["value"].null_count)
+        logger.debug("schema:\n%s", tidy.schema)
+
+    return tidy
 
 def fetch_one_day(day_local, areas, source="smartgriddashboard_api"):
     # 1) validate inputs
@@ -259,9 +384,6 @@ def fetch_one_day(day_local, areas, source="smartgriddashboard_api"):
     print(f"[{day_local}] areas={areas} → raw={len(raw)} tidy={len(tidy)} staged={inserted}")
     return inserted
 
-from datetime import date, timedelta
-import time
-
 def fetch_range(start_date, end_date, areas=DEFAULT_AREAS):
     # --- validate inputs ---
     if not isinstance(start_date, date) or not isinstance(end_date, date):
@@ -274,22 +396,28 @@ def fetch_range(start_date, end_date, areas=DEFAULT_AREAS):
     if unexpected:
         raise ValueError(f"Unexpected areas: {sorted(unexpected)}; allowed={sorted(AREA_TO_METRIC.keys())}")
 
-    # --- loop days ---
+    # --- fetch days concurrently (network-bound; request rate is capped by BUCKET,
+    #     each stage_readings call opens its own connection) ---
     n_days = (end_date - start_date).days + 1
-    days_attempted = 0
+    days = [start_date + timedelta(days=i) for i in range(n_days)]
+    days_attempted = len(days)
     days_succeeded = 0
     rows_total = 0
 
-    for i in range(n_days):
-        d = start_date + timedelta(days=i)
-        days_attempted += 1
-
-        inserted = fetch_one_day(d, areas)  # <- capture return value
-        rows_total += inserted
-        if inserted > 0:
-            days_succeeded += 1
-
-        time.sleep(0.7)  # polite pacing; adjust if needed
+    with ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS) as ex:
+        futures = [ex.submit(fetch_one_day, d, areas) for d in days]
+
+        try:
+            for fut in as_completed(futures):
+                inserted = fut.result()  # re-raises any per-day failure
+                rows_total += inserted
+                if inserted > 0:
+                    days_succeeded += 1
+        except BaseException:
+            # stop at the first failing day (like the serial loop did): drop the
+            # days not started yet instead of requesting the whole range first
+            ex.shutdown(wait=True, cancel_futures=True)
+            raise
 
     # --- summary ---
     print(f"[range] {start_date} → {end_date} | days={days_attempted} ok={days_succeeded} rows={rows_total}")
@@ -306,16 +434,16 @@ if __name__ == "__main__":
     resp = request_with_retry(params)
     print("HTTP response:", resp)
 
-    # 3) Parse JSON → raw dataframe
+    # 3) Parse JSON → raw Arrow table
     raw = parse_json_to_raw_df(resp)
     print(f"[OK] Raw rows: {len(raw)}")
-    print(raw.head(3))
+    print(raw.slice(0, 3).to_pylist())
     print()
 
     # 4) Tidy + timezone standardisation
     tidy = tidy_raw_df(raw)
     print(f"[OK] Tidy rows: {len(tidy)}")
-    print(tidy.head())
+    print(tidy.slice(0, 5).to_pylist())
     print()
 
     # 5) Stage into SQLite
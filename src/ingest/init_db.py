@@ -1,10 +1,27 @@
 # Import statements
-from datetime import timezone
-from zoneinfo import ZoneInfo
-import pandas as pd
 import sqlite3
+import zlib
+from functools import lru_cache
 from pathlib import Path
 
+@lru_cache(maxsize=None)
+def _read_schema(schema_path: Path) -> tuple[str, int]:
+    # Schema text + a stable 31-bit checksum used as the PRAGMA user_version marker
+    schema_cmd = schema_path.read_text(encoding="utf-8")
+    return schema_cmd, zlib.crc32(schema_cmd.encode("utf-8")) & 0x7FFFFFFF
+
+def _migrate_fact_ts_epoch(conn: sqlite3.Connection) -> None:
+    # fact_readings created before ts_epoch existed: add the generated column
+    # (VIRTUAL, so no table rewrite) ahead of schema.sql indexing it.
+    # A new DB gets it straight from CREATE TABLE.
+    cols = {row[1] for row in conn.execute("PRAGMA table_xinfo(fact_readings);")}
+    if cols and "ts_epoch" not in cols:
+        print("Migrating fact_readings: adding generated column ts_epoch")
+        conn.execute(
+            "ALTER TABLE fact_readings ADD COLUMN ts_epoch INTEGER "
+            "GENERATED ALWAYS AS (CAST(strftime('%s', ts_utc) AS INTEGER)) VIRTUAL;"
+        )
+
 def initialize_db():
     # Investigate the path of this file
     INIT_DB_PATH = Path(__file__)
@@ -34,12 +51,25 @@ def initialize_db():
     # Connect to the DB and Turn FK's on
     with sqlite3.connect(DB_PATH) as conn:
         conn.execute("PRAGMA foreign_keys = ON;")
+        # WAL is persistent for the DB file; per-connection PRAGMAs live in get_conn()
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA mmap_size = 268435456;")
 
-    # Read Schema and execute the Query script
-        schema_cmd = SCHEMA_PATH.read_text(encoding="utf-8")
-        conn.executescript(schema_cmd)
+    # Read Schema and execute the Query script (skipped when this exact schema
+    # was already applied; user_version holds the checksum of the last run)
+        schema_cmd, schema_version = _read_schema(SCHEMA_PATH)
+        applied_version = conn.execute("PRAGMA user_version;").fetchone()[0]
+        if applied_version != schema_version:
+            _migrate_fact_ts_epoch(conn)
+            conn.executescript(schema_cmd)
+            conn.execute(f"PRAGMA user_version = {schema_version};")
+        else:
+            print(f"Schema unchanged (user_version={schema_version}); skipping executescript.")
     # TEST
         test_query = conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
         print(test_query.fetchall())
 
-initialize_db()
\ No newline at end of file
+if __name__ == "__main__":
+    initialize_db()
@@ -11,7 +11,32 @@ import sqlite3
 from pathlib import Path
 
 
-def apply_views(db_path: Path, views_sql_path: Path) -> None:
+def refresh_materialized_views(con: sqlite3.Connection) -> None:
+    """
+    Rebuild mat_forecast_vs_actual_all from vw_forecast_vs_actual_all.
+
+    The table is a physical snapshot of the view (joins + error arithmetic
+    evaluated once), indexed in dashboard-export order. It is rebuilt in a
+    single transaction so readers never see a half-refreshed table.
+    """
+    con.execute("BEGIN IMMEDIATE;")
+    try:
+        con.execute("DROP TABLE IF EXISTS mat_forecast_vs_actual_all;")
+        con.execute(
+            "CREATE TABLE mat_forecast_vs_actual_all AS "
+            "SELECT * FROM vw_forecast_vs_actual_all;"
+        )
+        con.execute(
+            "CREATE INDEX ix_mat_fva_export ON mat_forecast_vs_actual_all "
+            "(metric_code, region_code, forecast_date, ts_utc, model_name, train_days);"
+        )
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+
+
+def apply_views(db_path: Path, views_sql_path: Path, refresh: bool = True) -> None:
     if not db_path.exists():
         raise FileNotFoundError(f"Database not found: {db_path}")
 
@@ -24,6 +49,9 @@ def apply_views(db_path: Path, views_sql_path: Path) -> None:
     try:
         con.executescript(sql)
         con.commit()
+
+        if refresh:
+            refresh_materialized_views(con)
     finally:
         con.close()
 
@@ -37,7 +65,7 @@ def main() -> None:
     print(f"Views SQL: {views_sql_path}")
 
     apply_views(db_path, views_sql_path)
-    print("✅ Views applied (safe to re-run).")
+    print("✅ Views applied + materialized tables refreshed (safe to re-run).")
 
 
 if __name__ == "__main__":
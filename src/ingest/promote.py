@@ -1,7 +1,14 @@
 # src/ingest/promote.py
 
+import os
 import sqlite3
+import threading
+from bisect import bisect_right
+from collections import Counter
+from contextlib import contextmanager
 from datetime import timedelta, datetime, date
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
@@ -18,6 +25,29 @@ DB_PATH = PROJECT_ROOT / "db" / "eirgrid.db"
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
+# ---------------------------------------------------------------------
+# Time zones / local-day bounds
+# ---------------------------------------------------------------------
+
+TZ_DUBLIN = ZoneInfo("Europe/Dublin")
+TZ_UTC = ZoneInfo("UTC")
+TS_UTC_FMT = "%Y-%m-%dT%H:%M:%SZ"  # ts_utc TEXT format in the DB
+
+
+def _day_utc_bounds(day_local: date) -> tuple[str, str]:
+    """
+    [start, end) of a local (Europe/Dublin) calendar day as UTC ISO strings
+    in the ts_utc format. DST days span 23h/25h in UTC.
+    """
+    start_local = datetime(day_local.year, day_local.month, day_local.day, 0, 0, 0, tzinfo=TZ_DUBLIN)
+    end_local = start_local + timedelta(days=1)
+
+    return (
+        start_local.astimezone(TZ_UTC).strftime(TS_UTC_FMT),
+        end_local.astimezone(TZ_UTC).strftime(TS_UTC_FMT),
+    )
+
+
 # ---------------------------------------------------------------------
 # Connection + dimension lookups
 # ---------------------------------------------------------------------
@@ -26,15 +56,75 @@ def get_conn() -> sqlite3.Connection:
     """
     Open a SQLite connection to our project DB and enable foreign keys.
 
+    Also applies per-connection write/read tuning (journal_mode=WAL is
+    persistent and set once by init_db.initialize_db):
+      - synchronous=NORMAL  (fsync at checkpoints, safe under WAL)
+      - temp_store=MEMORY
+      - mmap_size=256 MiB
+      - cache_size=~200 MB  (upper bound; pages are allocated on demand)
+
+    Opened with isolation_level=None: the sqlite3 module never opens or
+    commits transactions implicitly. Writers issue BEGIN / COMMIT themselves
+    (or conn.commit(), which `with` also calls on exit); without a BEGIN each
+    statement autocommits. Don't mix in code that relies on implicit
+    transactions.
+
     Usage:
         with get_conn() as conn:
+            conn.execute("BEGIN;")
             ...
+
+    Inside a shared_conn() block, returns that block's connection instead.
     """
-    conn = sqlite3.connect(DB_PATH)
+    shared = getattr(_SHARED_CONN, "conn", None)
+    # (a forked worker inherits the parent's thread-local; never reuse it there)
+    if shared is not None and _SHARED_CONN.pid == os.getpid():
+        return shared
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA mmap_size = 268435456;")
+    conn.execute("PRAGMA cache_size = -200000;")
     return conn
 
 
+# Connection held by an active shared_conn() block, per thread
+_SHARED_CONN = threading.local()
+
+
+@contextmanager
+def shared_conn():
+    """
+    Within the block, every get_conn() on this thread returns one connection
+    (closed on exit), so long runs like a backfill skip the per-call connect
+    + PRAGMA setup and keep one warm page cache / mmap. Other threads and
+    worker processes still open their own. Re-entrant.
+
+    The usual `with get_conn() as conn:` only commits/rolls back, so it is
+    safe on the shared connection; code must not leave a transaction open
+    across get_conn() calls.
+    """
+    if getattr(_SHARED_CONN, "conn", None) is not None:
+        yield _SHARED_CONN.conn
+        return
+
+    conn = get_conn()
+    _SHARED_CONN.conn, _SHARED_CONN.pid = conn, os.getpid()
+    try:
+        yield conn
+    finally:
+        _SHARED_CONN.conn = None
+        conn.close()
+
+
+# Dimension maps per database file; dims only change when seeded, and
+# seed_dimensions() clears this. (Keyed by file, not connection: callers
+# open a fresh connection per operation.)
+_DIM_MAPS_CACHE: dict[str, tuple[dict, dict]] = {}
+
+
 def get_dim_maps(conn: sqlite3.Connection):
     """
     Read dimension tables and build quick lookup maps:
@@ -42,9 +132,14 @@ def get_dim_maps(conn: sqlite3.Connection):
       metric_map: metric_code -> metric_id
       region_map: region_code -> region_id
 
-    These are used to convert the canonical slice from metric_code/region_code
-    to the integer IDs stored in fact_readings.
+    These are used to convert metric_code/region_code to the integer IDs
+    stored in fact_readings. Cached per database file (see clear_dim_maps_cache).
     """
+    db_file = conn.execute("PRAGMA database_list;").fetchone()[2]
+    cached = _DIM_MAPS_CACHE.get(db_file)
+    if cached is not None:
+        return cached
+
     cur = conn.cursor()
 
     cur.execute("SELECT metric_id, metric_code FROM dim_metric ORDER BY metric_code;")
@@ -56,68 +151,95 @@ def get_dim_maps(conn: sqlite3.Connection):
     metric_map = {code: mid for (mid, code) in metric_rows}
     region_map = {code: rid for (rid, code) in region_rows}
 
+    # in-memory DBs report "" and are not shared across connections; don't cache them
+    if db_file:
+        _DIM_MAPS_CACHE[db_file] = (metric_map, region_map)
+
     return metric_map, region_map
 
 
+def clear_dim_maps_cache() -> None:
+    """Forget cached dimension maps (call after dim_metric/dim_region change)."""
+    _DIM_MAPS_CACHE.clear()
+
+
+# ---------------------------------------------------------------------
+# Bulk inserts (multi-row VALUES)
+# ---------------------------------------------------------------------
+
+# Bound parameters per statement; 999 is the lowest SQLITE_MAX_VARIABLE_NUMBER
+# any SQLite build ships with (3.32+ defaults to 32766).
+SQLITE_MAX_VARIABLES = 999
+
+
+@lru_cache(maxsize=None)
+def _multi_values_sql(table: str, columns: tuple[str, ...], n_rows: int) -> str:
+    row = "(" + ", ".join("?" * len(columns)) + ")"
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row] * n_rows) + ";"
+
+
+def insert_rows_multi_values(cur, table: str, columns: tuple[str, ...], rows) -> int:
+    """
+    INSERT `rows` (an iterable of tuples matching `columns`) with one
+    multi-row `INSERT ... VALUES (...), (...), ...` statement per chunk of
+    up to SQLITE_MAX_VARIABLES // len(columns) rows. Far fewer statement
+    executions than executemany for the same data.
+
+    Runs in whatever transaction the caller has open. Returns rows inserted.
+    """
+    chunk_rows = SQLITE_MAX_VARIABLES // len(columns)
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return total
+        cur.execute(
+            _multi_values_sql(table, columns, len(chunk)),
+            list(chain.from_iterable(chunk)),
+        )
+        total += len(chunk)
+
+
 # ---------------------------------------------------------------------
 # Expected slots for a local calendar day (handles DST)
 # ---------------------------------------------------------------------
 
+@lru_cache(maxsize=None)
 def promote_complete_days(day_local: date) -> int:
     """
     For a given local calendar day (Europe/Dublin), return the expected
     number of quarter-hour slots.
 
     Usually 96, but DST transitions can produce 92 or 100. We derive this
-    by actually generating the timestamps.
-    """
-    tz = ZoneInfo("Europe/Dublin")
-
-    start_local = datetime(
-        year=day_local.year,
-        month=day_local.month,
-        day=day_local.day,
-        hour=0,
-        minute=0,
-        second=0,
-        tzinfo=tz,
-    )
+    from the day's true UTC length (local midnight → next local midnight)
+    divided by 15 minutes. Cached: the answer for a date never changes.
+    """
+    start_local = datetime(day_local.year, day_local.month, day_local.day, 0, 0, 0, tzinfo=TZ_DUBLIN)
     end_local = start_local + timedelta(days=1)
 
-    timestamps = pd.date_range(
-        start=start_local,
-        end=end_local,
-        freq="15min",
-        inclusive="left",
-    )
+    start_utc = start_local.astimezone(TZ_UTC)
+    end_utc = end_local.astimezone(TZ_UTC)
 
-    expected_slots = len(timestamps)
-    return expected_slots
+    return int((end_utc - start_utc).total_seconds() // 900)
 
 
 # ---------------------------------------------------------------------
 # Diagnostics: staging row counts per day (including duplicates)
 # ---------------------------------------------------------------------
 
-def count_staging_rows_for_day(conn: sqlite3.Connection, day_local: date) -> pd.DataFrame:
+def _staging_row_counts(conn: sqlite3.Connection, day_local: date) -> list[tuple[str, str, int]]:
     """
     For a given local day, count *all* staging rows (including duplicates)
     per (metric_code, region_code) in stg_readings.
 
-    Returns a DataFrame with:
-        metric_code, region_code, rows
+    Returns raw (metric_code, region_code, rows) tuples.
     """
     if not isinstance(day_local, date):
         raise ValueError(f"{day_local!r} is not a datetime.date")
 
-    # Build local day bounds
-    tz = ZoneInfo("Europe/Dublin")
-    start_local = datetime(day_local.year, day_local.month, day_local.day, 0, 0, 0, tzinfo=tz)
-    end_local = start_local + timedelta(days=1)
-
-    # Convert to UTC ISO strings (same format as stored in ts_utc)
-    start_utc = start_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
-    end_utc = end_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # Local day bounds as UTC ISO strings (same format as stored in ts_utc)
+    start_utc, end_utc = _day_utc_bounds(day_local)
 
     sql = """
         SELECT
@@ -132,36 +254,42 @@ def count_staging_rows_for_day(conn: sqlite3.Connection, day_local: date) -> pd.
         GROUP BY m.metric_code, r.region_code
         ORDER BY m.metric_code, r.region_code;
     """
-    cur = conn.cursor()
-    cur.execute(sql, (start_utc, end_utc))
-    rows = cur.fetchall()
+    return conn.execute(sql, (start_utc, end_utc)).fetchall()
 
-    df = pd.DataFrame(rows, columns=["metric_code", "region_code", "rows"])
-    return df
+
+def count_staging_rows_for_day(conn: sqlite3.Connection, day_local: date) -> pd.DataFrame:
+    """
+    DataFrame view of _staging_row_counts (for printing/diagnostics).
+
+    Returns a DataFrame with:
+        metric_code, region_code, rows
+    """
+    rows = _staging_row_counts(conn, day_local)
+    return pd.DataFrame(rows, columns=["metric_code", "region_code", "rows"])
 
 
 # ---------------------------------------------------------------------
 # Completeness check: distinct UTC slot coverage per metric/region
 # ---------------------------------------------------------------------
 
-def distinct_slot_coverage(conn: sqlite3.Connection, day_local: date) -> pd.DataFrame:
+def _slot_coverage_rows(
+    conn: sqlite3.Connection,
+    day_local: date,
+    only_incomplete: bool = False,
+) -> list[tuple[str, str, int]]:
     """
     For a given local day, count DISTINCT ts_utc values per (metric_code, region_code)
-    in stg_readings, then compare against the expected number of slots.
+    in stg_readings.
 
-    Returns a DataFrame with:
-        metric_code, region_code, distinct_slots, expected_slots, missing, is_complete
+    Returns raw (metric_code, region_code, distinct_slots) tuples. With
+    only_incomplete=True, SQL filters to combos whose count differs from
+    promote_complete_days(day_local), so a complete day returns [].
     """
     if not isinstance(day_local, date):
         raise ValueError(f"{day_local!r} is not a datetime.date")
 
-    # 1) Build local day bounds and convert to UTC ISO
-    tz = ZoneInfo("Europe/Dublin")
-    start_local = datetime(day_local.year, day_local.month, day_local.day, 0, 0, 0, tzinfo=tz)
-    end_local = start_local + timedelta(days=1)
-
-    start_utc = start_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
-    end_utc = end_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # 1) Local day bounds as UTC ISO strings
+    start_utc, end_utc = _day_utc_bounds(day_local)
 
     # 2) Count DISTINCT UTC timestamps by metric/region in staging
     sql = """
@@ -173,15 +301,30 @@ def distinct_slot_coverage(conn: sqlite3.Connection, day_local: date) -> pd.Data
         WHERE sr.ts_utc >= ?
           AND sr.ts_utc <  ?
         GROUP BY sr.metric_code, sr.region_code
+        {having}
         ORDER BY sr.metric_code, sr.region_code;
     """
-    cur = conn.cursor()
-    cur.execute(sql, (start_utc, end_utc))
-    rows = cur.fetchall()
+    params: list = [start_utc, end_utc]
+    having = ""
+    if only_incomplete:
+        having = "HAVING COUNT(DISTINCT sr.ts_utc) <> ?"
+        params.append(promote_complete_days(day_local))
+
+    return conn.execute(sql.format(having=having), params).fetchall()
+
 
+def distinct_slot_coverage(conn: sqlite3.Connection, day_local: date) -> pd.DataFrame:
+    """
+    DataFrame view of _slot_coverage_rows with the completeness math applied
+    (for printing/diagnostics).
+
+    Returns a DataFrame with:
+        metric_code, region_code, distinct_slots, expected_slots, missing, is_complete
+    """
+    rows = _slot_coverage_rows(conn, day_local)
     df = pd.DataFrame(rows, columns=["metric_code", "region_code", "distinct_slots"])
 
-    # 3) Completeness math
+    # Completeness math
     expected = promote_complete_days(day_local)  # e.g., 96 (or 92/100 on DST days)
     df["expected_slots"] = expected
     df["missing"] = df["expected_slots"] - df["distinct_slots"]
@@ -191,188 +334,289 @@ def distinct_slot_coverage(conn: sqlite3.Connection, day_local: date) -> pd.Data
 
 
 # ---------------------------------------------------------------------
-# Build canonical slice for one complete day
+# Completeness check: days already fully promoted into fact_readings
 # ---------------------------------------------------------------------
 
-def build_canonical_slice_for_day(conn: sqlite3.Connection, day_local: date) -> pd.DataFrame:
+def fact_complete_days(conn: sqlite3.Connection, days, series_per_slot: int) -> set[date]:
     """
-    For a given local calendar day (Europe/Dublin):
-
-      1) Validate that all metric/region combos have a full set of 15-min slots
-         (using distinct_slot_coverage).
-      2) Pull ALL staging rows for that UTC window from stg_readings.
-      3) For each (ts_utc, metric_code, region_code), keep only the latest ingested_at.
-      4) Map metric_code/region_code -> metric_id/region_id using dimension tables.
-      5) Return a canonical DataFrame with columns: ts_utc, metric_id, region_id, value.
+    Which of the given local days are already complete in fact_readings:
+    every quarter-hour slot (promote_complete_days) holds a non-NULL value
+    for at least series_per_slot (metric, region) series.
 
-    This does NOT insert into fact_readings; it just returns the slice ready to insert.
+    One query over the whole span; per-slot counts are bucketed into local
+    days in Python (DST-safe via _day_utc_bounds).
     """
-    if not isinstance(day_local, date):
-        raise ValueError(f"{day_local!r} is not a datetime.date")
+    days = sorted(set(days))
+    if not days:
+        return set()
 
-    # --- 1) Build local bounds & convert to UTC ISO strings ---
-    tz_local = ZoneInfo("Europe/Dublin")
-    start_local = datetime(
-        year=day_local.year,
-        month=day_local.month,
-        day=day_local.day,
-        hour=0,
-        minute=0,
-        second=0,
-        tzinfo=tz_local,
-    )
-    end_local = start_local + timedelta(days=1)
+    bounds = [_day_utc_bounds(d) for d in days]
+    starts = [start for start, _ in bounds]
 
-    start_utc = start_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
-    end_utc = end_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
+    rows = conn.execute(
+        """
+        SELECT ts_utc, COUNT(value)
+        FROM fact_readings
+        WHERE ts_utc >= ?
+          AND ts_utc <  ?
+        GROUP BY ts_utc;
+        """,
+        (bounds[0][0], bounds[-1][1]),
+    ).fetchall()
 
-    # --- 2) Check completeness using distinct_slot_coverage ---
-    coverage = distinct_slot_coverage(conn, day_local)
-    if not coverage["is_complete"].all():
-        incomplete = coverage[~coverage["is_complete"]]
-        raise RuntimeError(
-            f"Incomplete day {day_local}: some metric/region combos have missing slots.\n"
-            f"{incomplete}"
-        )
+    full_slots: Counter = Counter()
+    for ts_utc, n_values in rows:
+        if n_values < series_per_slot:
+            continue
+        # ts_utc strings sort chronologically, so bisect finds the day
+        i = bisect_right(starts, ts_utc) - 1
+        if i >= 0 and ts_utc < bounds[i][1]:
+            full_slots[days[i]] += 1
 
-    # --- 3) Pull all staging rows for that UTC window ---
-    sql = """
+    return {d for d in days if full_slots[d] == promote_complete_days(d)}
+
+
+# ---------------------------------------------------------------------
+# Build canonical slice for one complete day
+# ---------------------------------------------------------------------
+
+# Last-write-wins per (ts_utc, metric_code, region_code), resolved in SQL:
+# newest ingested_at wins (later insert breaks ties). LEFT JOINs so unknown
+# codes surface as NULL ids and are reported instead of silently dropped.
+CANONICAL_SLICE_SQL = """
+    SELECT
+        sr.ts_utc,
+        m.metric_id,
+        r.region_id,
+        sr.value,
+        sr.metric_code,
+        sr.region_code
+    FROM (
         SELECT
             ts_utc,
             metric_code,
             region_code,
             value,
-            ingested_at,
-            source
+            ROW_NUMBER() OVER (
+                PARTITION BY ts_utc, metric_code, region_code
+                ORDER BY ingested_at DESC, rowid DESC
+            ) AS rn
         FROM stg_readings
         WHERE ts_utc >= ?
           AND ts_utc <  ?
-    """
-    cur = conn.cursor()
-    cur.execute(sql, (start_utc, end_utc))
-    rows = cur.fetchall()
+    ) AS sr
+    LEFT JOIN dim_metric AS m ON m.metric_code = sr.metric_code
+    LEFT JOIN dim_region AS r ON r.region_code = sr.region_code
+    WHERE sr.rn = 1
+"""
+
+LOAD_CANON_SQL = f"""
+    INSERT INTO _canon (ts_utc, metric_id, region_id, value, metric_code, region_code)
+    {CANONICAL_SLICE_SQL};
+"""
 
-    if not rows:
-        # This "shouldn't" happen if coverage says complete, but be defensive.
-        return pd.DataFrame(columns=["ts_utc", "metric_id", "region_id", "value"])
 
-    df = pd.DataFrame(
-        rows,
-        columns=["ts_utc", "metric_code", "region_code", "value", "ingested_at", "source"],
+def ensure_canon_temp_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the per-connection TEMP table `_canon` (once) that holds a day's
+    canonical slice before it is copied into fact_readings.
+    """
+    conn.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS _canon (
+            ts_utc      TEXT,
+            metric_id   INTEGER,
+            region_id   INTEGER,
+            value       REAL,
+            metric_code TEXT,
+            region_code TEXT
+        );
+        """
     )
 
-    # --- 4) Parse timestamps & sort so "latest ingested_at wins" ---
-    df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True, errors="raise")
-    df["ingested_at"] = pd.to_datetime(df["ingested_at"], utc=True, errors="coerce")
 
-    # Drop any rows with bad ingested_at (shouldn't usually happen)
-    df = df.dropna(subset=["ingested_at"])
+def load_canonical_slice_for_day(conn: sqlite3.Connection, day_local: date) -> int:
+    """
+    For a given local calendar day (Europe/Dublin):
 
-    # Sort so that the newest ingested_at is last within each group
-    df = df.sort_values(["ts_utc", "metric_code", "region_code", "ingested_at"])
+      1) Validate that all metric/region combos have a full set of 15-min slots
+         (using _slot_coverage_rows).
+      2) Deduplicate that UTC window of stg_readings in SQL (latest ingested_at
+         wins) and map codes -> IDs, writing straight into TEMP table `_canon`.
+      3) Reject slices with NULL values or unknown metric/region codes.
 
-    # --- 5) Deduplicate by (ts_utc, metric_code, region_code) keeping latest ingested_at ---
-    df_latest = (
-        df.groupby(["ts_utc", "metric_code", "region_code"], as_index=False)
-          .tail(1)
-          .reset_index(drop=True)
-    )
+    Returns the number of canonical rows now in `_canon`. No pandas and no
+    Python-side row loop: the slice never leaves SQLite.
+    """
+    if not isinstance(day_local, date):
+        raise ValueError(f"{day_local!r} is not a datetime.date")
 
-    # --- 6) Ensure value is numeric and non-null ---
-    df_latest["value"] = pd.to_numeric(df_latest["value"], errors="coerce")
-    if df_latest["value"].isna().any():
-        bad = df_latest[df_latest["value"].isna()]
+    # --- 1) Local day bounds as UTC ISO strings ---
+    start_utc, end_utc = _day_utc_bounds(day_local)
+
+    # --- 2) Check completeness (SQL returns only the short combos) ---
+    incomplete = _slot_coverage_rows(conn, day_local, only_incomplete=True)
+    if incomplete:
+        expected = promote_complete_days(day_local)
+        raise RuntimeError(
+            f"Incomplete day {day_local}: some metric/region combos have missing slots.\n"
+            + "\n".join(
+                f"  {metric_code}/{region_code}: {slots}/{expected} slots (missing {expected - slots})"
+                for (metric_code, region_code, slots) in incomplete
+            )
+        )
+
+    # --- 3) Dedup + ID mapping in SQL, straight into _canon ---
+    ensure_canon_temp_table(conn)
+
+    cur = conn.cursor()
+    cur.execute("DELETE FROM _canon;")
+    cur.execute(LOAD_CANON_SQL, (start_utc, end_utc))
+    n_rows = cur.rowcount
+
+    # --- 4) Ensure value is non-null and codes mapped to IDs ---
+    bad = cur.execute(
+        "SELECT ts_utc, metric_code, region_code FROM _canon WHERE value IS NULL LIMIT 10;"
+    ).fetchall()
+    if bad:
         raise RuntimeError(
             f"Found NULL/invalid values in canonical slice for {day_local}:\n{bad}"
         )
 
-    # --- 7) Map codes -> IDs using dimension tables ---
-    metric_map, region_map = get_dim_maps(conn)
+    unknown = cur.execute(
+        "SELECT DISTINCT metric_code FROM _canon WHERE metric_id IS NULL;"
+    ).fetchall()
+    if unknown:
+        raise RuntimeError(f"Unknown metric_code(s) when mapping to IDs: {[u[0] for u in unknown]}")
+
+    unknown = cur.execute(
+        "SELECT DISTINCT region_code FROM _canon WHERE region_id IS NULL;"
+    ).fetchall()
+    if unknown:
+        raise RuntimeError(f"Unknown region_code(s) when mapping to IDs: {[u[0] for u in unknown]}")
+
+    return n_rows
 
-    df_latest["metric_id"] = df_latest["metric_code"].map(metric_map)
-    df_latest["region_id"] = df_latest["region_code"].map(region_map)
 
-    if df_latest["metric_id"].isna().any():
-        unknown = df_latest[df_latest["metric_id"].isna()][["metric_code"]].drop_duplicates()
-        raise RuntimeError(f"Unknown metric_code(s) when mapping to IDs: {unknown}")
+def build_canonical_slice_for_day(conn: sqlite3.Connection, day_local: date) -> pd.DataFrame:
+    """
+    Load the canonical slice for a day (see load_canonical_slice_for_day) and
+    return it as a DataFrame with columns: ts_utc (ISO TEXT), metric_id,
+    region_id, value.
 
-    if df_latest["region_id"].isna().any():
-        unknown = df_latest[df_latest["region_id"].isna()][["region_code"]].drop_duplicates()
-        raise RuntimeError(f"Unknown region_code(s) when mapping to IDs: {unknown}")
+    This does NOT insert into fact_readings; it is for previews/diagnostics.
+    """
+    load_canonical_slice_for_day(conn, day_local)
 
-    # --- 8) Return canonical shape for fact_readings ---
-    canonical = df_latest[["ts_utc", "metric_id", "region_id", "value"]].copy()
-    return canonical
+    rows = conn.execute(
+        "SELECT ts_utc, metric_id, region_id, value FROM _canon ORDER BY ts_utc, metric_id, region_id;"
+    ).fetchall()
+    return pd.DataFrame(rows, columns=["ts_utc", "metric_id", "region_id", "value"])
 
 
 # ---------------------------------------------------------------------
 # Promotion operation: delete + insert (idempotent for a day)
 # ---------------------------------------------------------------------
 
-def promote_day_delete_insert(conn: sqlite3.Connection, day_local: date) -> int:
+# Fixed statement text so sqlite3's per-connection statement cache reuses the
+# prepared statements for every promoted day
+DELETE_FACT_DAY_SQL = """
+    DELETE FROM fact_readings
+    WHERE ts_utc >= ?
+      AND ts_utc <  ?;
+"""
+
+INSERT_FACT_FROM_CANON_SQL = """
+    INSERT INTO fact_readings (
+        ts_utc,
+        metric_id,
+        region_id,
+        value,
+        ingested_at
+    )
+    SELECT ts_utc, metric_id, region_id, value, ?
+    FROM _canon;
+"""
+
+
+def _replace_fact_day_from_canon(cur: sqlite3.Cursor, day_local: date) -> int:
+    """
+    Delete the day's UTC window from fact_readings, then copy `_canon` in with
+    one DB-side INSERT ... SELECT (fresh ingested_at). Returns rows inserted.
+    """
+    start_utc, end_utc = _day_utc_bounds(day_local)
+    cur.execute(DELETE_FACT_DAY_SQL, (start_utc, end_utc))
+
+    now_utc = datetime.now(tz=TZ_UTC).strftime(TS_UTC_FMT)
+    cur.execute(INSERT_FACT_FROM_CANON_SQL, (now_utc,))
+    return cur.rowcount
+
+
+def promote_day_delete_insert(
+    conn: sqlite3.Connection,
+    day_local: date,
+    cur: sqlite3.Cursor | None = None,
+) -> int:
     """
     Idempotent promotion for a single local calendar day:
 
-      1) Build canonical slice for the day (will raise if incomplete).
+      1) Load the canonical slice into `_canon` (will raise if incomplete).
       2) Delete any existing fact_readings rows for that day's UTC window.
       3) Insert the canonical rows with a fresh ingested_at timestamp.
 
+    Joins the caller's open transaction if there is one (and leaves the
+    commit to the caller, e.g. promote_range_delete_insert commits once per
+    range); otherwise runs the day in its own BEGIN IMMEDIATE ... COMMIT.
+
+    `cur` lets a caller share one cursor across many days.
+
     Returns the number of rows inserted into fact_readings.
     """
     if not isinstance(day_local, date):
         raise ValueError(f"{day_local!r} is not a datetime.date")
 
-    # Step 1: build canonical slice
-    canon = build_canonical_slice_for_day(conn, day_local)
-    if canon.empty:
-        print(f"[promote] {day_local} → no canonical rows (empty). Skipping.")
-        return 0
-
-    # Step 2: compute UTC window and delete existing rows for that day
-    tz_local = ZoneInfo("Europe/Dublin")
-    start_local = datetime(day_local.year, day_local.month, day_local.day, 0, 0, 0, tzinfo=tz_local)
-    end_local = start_local + timedelta(days=1)
-
-    start_utc = start_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
-    end_utc = end_local.astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-    cur = conn.cursor()
-    cur.execute(
-        """
-        DELETE FROM fact_readings
-        WHERE ts_utc >= ?
-          AND ts_utc <  ?;
-        """,
-        (start_utc, end_utc),
-    )
-
-    # Step 3: prepare rows to insert (with new ingested_at)
-    now_utc = datetime.now(tz=ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
+    own_txn = not conn.in_transaction
+    if own_txn:
+        conn.execute("BEGIN IMMEDIATE;")
+
+    try:
+        # Step 1: load canonical slice into _canon
+        n_canon = load_canonical_slice_for_day(conn, day_local)
+        if n_canon == 0:
+            if own_txn:
+                conn.commit()
+            print(f"[promote] {day_local} → no canonical rows (empty). Skipping.")
+            return 0
+
+        # Steps 2-3: replace the day's fact rows with the contents of _canon
+        if cur is None:
+            cur = conn.cursor()
+        inserted = _replace_fact_day_from_canon(cur, day_local)
 
-    rows_to_insert = []
-    for ts, metric_id, region_id, value in canon.to_records(index=False):
-        ts_iso = ts.isoformat().replace("+00:00", "Z")  # match ts_utc TEXT format in DB
-        rows_to_insert.append((ts_iso, int(metric_id), int(region_id), float(value), now_utc))
+        if own_txn:
+            conn.commit()
+    except BaseException:
+        if own_txn:
+            conn.rollback()
+        raise
 
-    insert_sql = """
-        INSERT INTO fact_readings (
-            ts_utc,
-            metric_id,
-            region_id,
-            value,
-            ingested_at
-        )
-        VALUES (?, ?, ?, ?, ?);
-    """
-    cur.executemany(insert_sql, rows_to_insert)
-    conn.commit()
-
-    inserted = len(rows_to_insert)
     print(f"[promote] {day_local} → inserted {inserted} canonical rows into fact_readings")
     return inserted
 
 
-def promote_range_delete_insert(conn: sqlite3.Connection, start_date: date, end_date: date) -> dict:
+def promote_range_delete_insert(
+    conn: sqlite3.Connection,
+    start_date: date,
+    end_date: date,
+) -> dict:
+    """
+    Promote every day in [start_date, end_date] inside ONE transaction
+    (one commit/fsync for the whole range; if the caller already has a
+    transaction open, it is joined and the commit is left to the caller,
+    as in promote_day_delete_insert). Each day runs under its own
+    SAVEPOINT, so a failing day is rolled back and skipped without
+    aborting the rest of the batch.
+    """
     if not isinstance(start_date, date) or not isinstance(end_date, date):
         raise ValueError("start_date and end_date must be datetime.date")
     if start_date > end_date:
@@ -384,17 +628,39 @@ def promote_range_delete_insert(conn: sqlite3.Connection, start_date: date, end_
     days_succeeded = 0
     rows_total = 0
 
-    for i in range(n_days):
-        day = start_date + timedelta(days=i)
-        days_attempted += 1
+    days = [start_date + timedelta(days=i) for i in range(n_days)]
 
-        try:
-            inserted = promote_day_delete_insert(conn, day)
-            days_succeeded += 1
-            rows_total += inserted
-        except Exception as e:
-            print(f"[promote_range] ERROR on {day}: {e}")
-            continue
+    # Join the caller's open transaction if there is one (and leave the
+    # commit to the caller); otherwise take the write lock up front for the
+    # whole range
+    own_txn = not conn.in_transaction
+    if own_txn:
+        conn.execute("BEGIN IMMEDIATE;")
+
+    cur = conn.cursor()
+
+    try:
+        for day in days:
+            days_attempted += 1
+
+            cur.execute("SAVEPOINT promote_day;")
+            try:
+                inserted = promote_day_delete_insert(conn, day, cur=cur)
+                cur.execute("RELEASE promote_day;")
+                days_succeeded += 1
+                rows_total += inserted
+            except Exception as e:
+                cur.execute("ROLLBACK TO promote_day;")
+                cur.execute("RELEASE promote_day;")
+                print(f"[promote_range] ERROR on {day}: {e}")
+                continue
+
+        if own_txn:
+            conn.commit()
+    except BaseException:
+        if own_txn:
+            conn.rollback()
+        raise
 
     summary = {"days_attempted": days_attempted,
                "days_succeeded": days_succeeded,
@@ -444,9 +710,8 @@ if __name__ == "__main__":
             inserted = promote_day_delete_insert(conn, test_day)
 
             # Count fact_readings rows for the local-day UTC window
-            tz = ZoneInfo("UTC")
             start_utc = datetime(test_day.year, test_day.month, test_day.day,
-                                 0, 0, 0, tzinfo=tz)
+                                 0, 0, 0, tzinfo=TZ_UTC)
             end_utc = start_utc + timedelta(days=1)
 
             cur = conn.cursor()
@@ -454,8 +719,8 @@ if __name__ == "__main__":
                 SELECT COUNT(*) FROM fact_readings
                 WHERE ts_utc >= ? AND ts_utc < ?
             """, (
-                start_utc.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                end_utc.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                start_utc.strftime(TS_UTC_FMT),
+                end_utc.strftime(TS_UTC_FMT),
             ))
             (fact_rows,) = cur.fetchone()
 
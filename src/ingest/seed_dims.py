@@ -1,6 +1,7 @@
-import sqlite3
 from pathlib import Path
 
+from ingest.promote import clear_dim_maps_cache, get_conn
+
 def seed_dimensions():
     # Investigate the path of this file
     INIT_DB_PATH = Path(__file__)
@@ -33,13 +34,16 @@ def seed_dimensions():
     # Test
     print(f"Metrics list: {metrics_list}, Regions list: {regions_list}")
 
-    # Connect to the DB and Turn FK's on
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute("PRAGMA foreign_keys = ON;")
-
-        # Insert metric and region lists into the DB
+    # Connect to the DB (get_conn: FK's on, explicit transactions)
+    with get_conn() as conn:
+        # Insert metric and region lists into the DB in one transaction
+        conn.execute("BEGIN;")
         conn.executemany("INSERT OR IGNORE INTO dim_metric (metric_code,unit) VALUES (?,?);", metrics_list,)
         conn.executemany("INSERT OR IGNORE INTO dim_region (region_code) VALUES (?);", regions_list,)
+        conn.execute("COMMIT;")
+
+        # Refresh planner statistics so the range indexes (ix_stg_window, ix_fact_ts) get picked
+        conn.execute("ANALYZE;")
 
         # Test
         metrics = conn.execute(
@@ -58,6 +62,9 @@ def seed_dimensions():
         for row in regions:
             print(" ", row)
 
+    # Dimensions may have changed; drop any cached code → id maps
+    clear_dim_maps_cache()
+
     print("\n✅ Seeding complete (safe to re-run).")
 
 # Allow script to run standalone
@@ -1,92 +1,90 @@
 import sqlite3
+from itertools import repeat
 from pathlib import Path
 from datetime import datetime, timezone
 
-def stage_readings(df_tidy, source="smartgriddashboard_api"):
-    # Investigate the path of this file
-    INIT_DB_PATH = Path(__file__)
+import pyarrow as pa
+import pyarrow.compute as pc
 
-    # Move up the file path to the correct folder
-    PROJECT_ROOT = INIT_DB_PATH.resolve().parents[2]
+from ingest.promote import get_conn, insert_rows_multi_values
 
-    # Build the file path for the schema and database files
-    DB_PATH = PROJECT_ROOT / "db" / "eirgrid.db"
+STG_COLUMNS = ("ts_utc", "metric_code", "region_code", "value", "source", "ingested_at")
 
-    # Create file directory (if not exist)
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Rows converted Arrow -> Python per chunk (bounds memory on large loads)
+STAGE_BATCH_ROWS = 10_000
 
+def stage_readings(tidy, source="smartgriddashboard_api"):
     # Check columns
     required_columns = {"ts_utc", "metric", "region", "value"}
-    missing = required_columns - set(df_tidy.columns)
+    missing = required_columns - set(tidy.column_names)
     if missing:
         raise ValueError(f"Missing required columns: {sorted(missing)}")
 
     # Check timezone awareness
-    tzinfo = getattr(df_tidy["ts_utc"].dtype, "tz", None)
-    if tzinfo is None:
+    ts_type = tidy.schema.field("ts_utc").type
+    tzinfo = getattr(ts_type, "tz", None)
+    if not pa.types.is_timestamp(ts_type) or tzinfo is None:
         raise ValueError(
-            "Column 'ts_utc' must be timezone-aware. "
-            "Localize/convert first, e.g. df['ts_utc'] = df['ts_utc'].dt.tz_convert('UTC')"
+            "Column 'ts_utc' must be a timezone-aware timestamp. "
+            "Localize/convert first, e.g. pc.assume_timezone(ts, 'Europe/Dublin')"
         )
 
     # Check it's actually UTC
-    # (tzinfo can be a zoneinfo/pytz timezone object; stringifying is a simple robust check)
-    if str(tzinfo).upper() not in ("UTC", "UTC+00:00"):
+    if str(tzinfo).upper() not in ("UTC", "UTC+00:00", "+00:00"):
         raise ValueError(
             f"Column 'ts_utc' must be in UTC (found {tzinfo}). "
-            "Convert with: df['ts_utc'] = df['ts_utc'].dt.tz_convert('UTC')"
+            "Convert with: pc.cast(ts, pa.timestamp('s', tz='UTC'))"
         )
 
-    # safe even if already UTC
-    ts_utc_str = (
-        df_tidy["ts_utc"]
-        .dt.tz_convert("UTC")
-        .dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    # Whole-second UTC strings (second unit keeps %S free of fractional digits)
+    ts_utc_str = pc.strftime(
+        pc.cast(tidy["ts_utc"], pa.timestamp("s", tz="UTC")),
+        format="%Y-%m-%dT%H:%M:%SZ",
     )
 
     ingested_at_str = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
-    # Build rows in the exact insert order
-    rows_df = df_tidy.assign(
-        ts_utc_str=ts_utc_str,
-        source=source,
-        ingested_at=ingested_at_str,
-    )[["ts_utc_str", "metric", "region", "value", "source", "ingested_at"]]
-
-    rows = list(rows_df.itertuples(index=False, name=None))
-    row_count = len(rows)
-
-    # Connect to DB
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute("PRAGMA foreign_keys = ON;")
-        sql = """
-            INSERT INTO stg_readings
-              (ts_utc, metric_code, region_code, value, source, ingested_at)
-            VALUES (?, ?, ?, ?, ?, ?);
-        """
-        conn.executemany(sql, rows)
+    row_count = tidy.num_rows
+
+    # Connect to DB (get_conn applies FK + synchronous/temp_store/mmap/cache PRAGMAs).
+    # One transaction for the whole load; rows are converted and inserted in
+    # STAGE_BATCH_ROWS chunks so Python memory stays bounded on large loads.
+    with get_conn() as conn:
+        cur = conn.cursor()
+        conn.execute("BEGIN;")
+        for offset in range(0, row_count, STAGE_BATCH_ROWS):
+            chunk = tidy.slice(offset, STAGE_BATCH_ROWS)
+
+            # Rows in the exact insert order, streamed straight from the column
+            # lists into multi-row INSERTs (Arrow → Python only at this boundary)
+            rows = zip(
+                ts_utc_str.slice(offset, STAGE_BATCH_ROWS).to_pylist(),
+                chunk["metric"].to_pylist(),
+                chunk["region"].to_pylist(),
+                chunk["value"].to_pylist(),
+                repeat(source),
+                repeat(ingested_at_str),
+            )
+            insert_rows_multi_values(cur, "stg_readings", STG_COLUMNS, rows)
+
+        conn.execute("COMMIT;")
 
     return row_count
 
 
 # Test
 if __name__ == "__main__":
-    import pandas as pd
-    from pandas import Timestamp
-
-    df_tidy = pd.DataFrame({
-        "ts_utc": [Timestamp("2025-10-23 23:00:00", tz="UTC"),
-                   Timestamp("2025-10-23 23:15:00", tz="UTC")],
+    tidy = pa.table({
+        "ts_utc": pa.array([datetime(2025, 10, 23, 23, 0), datetime(2025, 10, 23, 23, 15)],
+                           type=pa.timestamp("s", tz="UTC")),
         "metric": ["wind_actual", "wind_actual"],
         "region": ["ALL", "ALL"],
         "value": [2648.0, 2700.0],
         # extra columns are fine; they’ll be ignored by our selection
         "unit": ["MW", "MW"],
-        "ts_local": [Timestamp("2025-10-24 00:00:00", tz="Europe/Dublin"),
-                     Timestamp("2025-10-24 00:15:00", tz="Europe/Dublin")],
     })
 
-    rows_added = stage_readings(df_tidy)
+    rows_added = stage_readings(tidy)
     print(f"Inserted {rows_added} rows into staging")
 
     PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -1,6 +1,13 @@
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 
+SLOTS_PER_DAY = 96
+
+# Built once: slot ids 0..95 and their offsets from the start of the day
+_SLOT_IDS = np.arange(SLOTS_PER_DAY)
+_SLOT_OFFSETS = pd.to_timedelta(_SLOT_IDS * 15, unit="min")
+
 def fallback_slot_median_next_day(df_hist: pd.DataFrame, forecast_date) -> pd.DataFrame:
     """
     Deterministic forecast:
@@ -8,24 +15,34 @@ def fallback_slot_median_next_day(df_hist: pd.DataFrame, forecast_date) -> pd.Da
     Expects df_hist columns: ['ds', 'y'] where ds is datetime-like.
     Returns Prophet-like frame: ['ds','yhat','yhat_lower','yhat_upper'] for next day at 15-min cadence.
     """
-    d = df_hist.copy()
-    d["ds"] = pd.to_datetime(d["ds"])
-    d["slot"] = d["ds"].dt.strftime("%H:%M")
+    # work on arrays; no copy of df_hist (tz-aware ds uses its wall-clock time)
+    ds = pd.to_datetime(df_hist["ds"])
+    if ds.dt.tz is not None:
+        ds = ds.dt.tz_localize(None)
+    ds_min = ds.to_numpy().astype("datetime64[m]").astype("int64")
+    y = df_hist["y"].to_numpy(dtype=float)
 
-    # robust central tendency per slot
-    slot_med = d.groupby("slot")["y"].median()
+    # integer time-of-day slot 0..95 (minute of day // 15) as the group key
+    slot = (ds_min % 1440) // 15
+
+    # robust central tendency per slot, as a length-96 lookup array (NaN = no history)
+    slot_med = pd.Series(y).groupby(slot).median().reindex(range(SLOTS_PER_DAY)).to_numpy()
 
     # build next day's 15-min grid based on observed cadence
     start = pd.Timestamp(forecast_date)
-    times = pd.date_range(start=start, periods=96, freq="15min")
+    times = start + _SLOT_OFFSETS
+    out_slot = (_SLOT_IDS + start.hour * 4 + start.minute // 15) % SLOTS_PER_DAY
+
+    # overall median computed once on the raw array (NaN-skipping, like pandas);
+    # it fills slots with no history and centres the MAD below
+    y_med = np.nanmedian(y)
 
-    out = pd.DataFrame({"ds": times})
-    out["slot"] = out["ds"].dt.strftime("%H:%M")
-    out["yhat"] = out["slot"].map(slot_med).fillna(d["y"].median())
+    yhat = slot_med[out_slot]
+    out = pd.DataFrame({"ds": times, "yhat": np.where(np.isnan(yhat), y_med, yhat)})
     out["yhat"] = out["yhat"].clip(lower=0)
 
     # conservative intervals (you can tighten later)
-    mad = (d["y"] - d["y"].median()).abs().median()
+    mad = np.nanmedian(np.abs(y - y_med))
     out["yhat_lower"] = (out["yhat"] - 2 * mad).clip(lower=0)
     out["yhat_upper"] = out["yhat"] + 2 * mad
 
@@ -18,16 +18,53 @@ IMPORTANT (no leakage):
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date, timedelta
+import hashlib
+import os
+from pathlib import Path
 import time
 
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_datetime64_any_dtype, is_float_dtype
 from prophet import Prophet
-import matplotlib.pyplot as plt
+from prophet.serialize import model_from_json, model_to_json
 
 from models.fallback_forecast import fallback_slot_median_next_day
-from warehouse.readings import get_metric_series, get_latest_complete_local_day
+from warehouse.readings import (
+    get_metric_series,
+    get_metrics_series_multi,
+    get_latest_complete_local_day,
+)
+
+
+# Paths
+INIT_PATH = Path(__file__)
+PROJECT_ROOT = INIT_PATH.resolve().parents[2]
+MODEL_CACHE_DIR = PROJECT_ROOT / "data" / "processed" / "model_cache"
+
+# Cached fits only ever hit on a same-day rerun (the key hashes the training
+# data), so files older than this are deleted whenever a new fit is saved
+MODEL_CACHE_MAX_AGE_DAYS = 7
+
+# Forecast value columns (MW; clipped at 0). Returned as float32: MW values
+# of 0-5000 lose nothing that matters, and frames are half the size.
+YHAT_COLS = ["yhat", "yhat_lower", "yhat_upper"]
+
+# Core metrics forecast by forecast_all_metrics_next_day
+METRIC_CODES = ["wind_actual", "solar_actual", "demand_actual"]
+
+# Posterior draws per prediction for yhat_lower/yhat_upper (Prophet's default
+# is 1000). 200 is ~5x faster to predict; yhat is unaffected, only the
+# interval edges get slightly noisier. 0 disables intervals.
+UNCERTAINTY_SAMPLES = 200
+
+# Training data older than this (before the last training timestamp) is
+# averaged to hourly before fitting: ~4x fewer rows on a 30-day window, while
+# the recent week keeps full 15-min detail for the daily/weekly shape.
+FULL_RES_RECENT_DAYS = 7
 
 
 # ---------------------------------------------------------------------
@@ -59,6 +96,24 @@ def load_metric_history_for_prophet(
     if not isinstance(metric_code, str) or not metric_code.strip():
         raise TypeError("metric_code must be a non-empty string.")
 
+    start_day, as_of_day = _training_window(train_days, as_of_day)
+
+    df = get_metric_series(metric_code, start_day, as_of_day)
+
+    if df.empty:
+        raise ValueError(
+            f"No data found for metric_code={metric_code!r} between {start_day} and {as_of_day}. "
+            "Check that ETL has promoted data into fact_readings."
+        )
+
+    if "ts_utc" in df.columns:
+        df = df.sort_values("ts_utc").reset_index(drop=True)
+
+    return df
+
+
+def _training_window(train_days: int, as_of_day: date | None) -> tuple[date, date]:
+    """Validate train_days/as_of_day and return the inclusive (start_day, as_of_day) window."""
     if not isinstance(train_days, int):
         raise TypeError("train_days must be an integer.")
     if train_days <= 0:
@@ -69,26 +124,77 @@ def load_metric_history_for_prophet(
     if not isinstance(as_of_day, date):
         raise TypeError("as_of_day must be a datetime.date or None.")
 
-    start_day = as_of_day - timedelta(days=train_days - 1)
+    return as_of_day - timedelta(days=train_days - 1), as_of_day
 
-    df = get_metric_series(metric_code, start_day, as_of_day)
 
-    if df.empty:
-        raise ValueError(
-            f"No data found for metric_code={metric_code!r} between {start_day} and {as_of_day}. "
-            "Check that ETL has promoted data into fact_readings."
-        )
+def _load_all_histories(
+    metric_codes: list[str],
+    train_days: int,
+    as_of_day: date | None,
+) -> dict[str, pd.DataFrame]:
+    """
+    load_metric_history_for_prophet for several metrics with a single
+    warehouse query. Returns {metric_code: history frame}.
+    """
+    start_day, as_of_day = _training_window(train_days, as_of_day)
 
-    if "ts_utc" in df.columns:
-        df = df.sort_values("ts_utc").reset_index(drop=True)
+    histories = get_metrics_series_multi(metric_codes, start_day, as_of_day)
+    _require_history(histories, start_day, as_of_day)
 
-    return df
+    return histories
+
+
+def _require_history(histories: dict[str, pd.DataFrame], start_day: date, as_of_day: date) -> None:
+    for code, df in histories.items():
+        if df.empty:
+            raise ValueError(
+                f"No data found for metric_code={code!r} between {start_day} and {as_of_day}. "
+                "Check that ETL has promoted data into fact_readings."
+            )
+
+
+def load_histories_for_range(
+    train_days: int,
+    first_as_of_day: date,
+    last_as_of_day: date,
+    metric_codes: list[str] = METRIC_CODES,
+) -> dict[str, pd.DataFrame]:
+    """
+    One warehouse read covering the training windows of every as_of_day in
+    [first_as_of_day, last_as_of_day] (consecutive windows overlap by
+    train_days - 1 days). Slice per day with slice_training_histories.
+    """
+    start_day, _ = _training_window(train_days, first_as_of_day)
+    return get_metrics_series_multi(metric_codes, start_day, last_as_of_day)
+
+
+def slice_training_histories(
+    bulk: dict[str, pd.DataFrame],
+    train_days: int,
+    as_of_day: date,
+) -> dict[str, pd.DataFrame]:
+    """
+    Cut as_of_day's training window out of load_histories_for_range output.
+    Same rows as _load_all_histories would read (UTC-date window, inclusive).
+    """
+    start_day, as_of_day = _training_window(train_days, as_of_day)
+    start_ts = pd.Timestamp(start_day, tz="UTC")
+    end_ts = pd.Timestamp(as_of_day + timedelta(days=1), tz="UTC")
+
+    histories = {}
+    for code, df in bulk.items():
+        # frames are sorted by ts_utc, so the window is one contiguous block
+        lo, hi = df["ts_utc"].searchsorted([start_ts, end_ts])
+        histories[code] = df.iloc[lo:hi].reset_index(drop=True)
+
+    _require_history(histories, start_day, as_of_day)
+    return histories
 
 
 # ---------------------------------------------------------------------
 # 2. Convert warehouse frame → Prophet frame (ds, y)
 # ---------------------------------------------------------------------
-def to_prophet_frame(df_metric: pd.DataFrame) -> pd.DataFrame:
+def to_prophet_frame(df_metric: pd.DataFrame, downsample_old: bool = True) -> pd.DataFrame:
     """
     Convert fact_readings-style dataframe into Prophet format.
 
@@ -99,6 +205,14 @@ def to_prophet_frame(df_metric: pd.DataFrame) -> pd.DataFrame:
     Output:
       - ds : naive datetime64[ns] (interpreted as UTC timestamps)
       - y  : float
+
+    With downsample_old=True (the default, so this applies to the daily
+    forecast too), rows older than FULL_RES_RECENT_DAYS before the last
+    timestamp are replaced by hourly means (faster Prophet fits). Each hourly
+    point is stamped at the mean time of the readings it averages (hh:22:30
+    for a full hour), not at the start of the hour, so it doesn't shift the
+    daily seasonality. The fit is therefore not identical to one on the full
+    15-min history.
     """
     required = {"ts_utc", "value"}
     if not required.issubset(df_metric.columns):
@@ -113,17 +227,40 @@ def to_prophet_frame(df_metric: pd.DataFrame) -> pd.DataFrame:
 
     df_prophet["y"] = df_prophet["y"].astype(float)
     df_prophet = df_prophet.sort_values("ds").reset_index(drop=True)
+
+    if downsample_old and not df_prophet.empty:
+        cutoff = df_prophet["ds"].iloc[-1] - pd.Timedelta(days=FULL_RES_RECENT_DAYS)
+        is_old = (df_prophet["ds"] < cutoff).to_numpy()
+        if is_old.any():
+            df_old = df_prophet[is_old].dropna(subset=["y"])
+            hourly = df_old.groupby(df_old["ds"].dt.floor("1h"), sort=True)
+            old_hourly = pd.DataFrame(
+                {"ds": hourly["ds"].mean(), "y": hourly["y"].mean()}
+            ).reset_index(drop=True)
+            df_prophet = pd.concat([old_hourly, df_prophet[~is_old]], ignore_index=True)
+
     return df_prophet
 
 
 # ---------------------------------------------------------------------
 # 3. Fit Prophet model
 # ---------------------------------------------------------------------
-def fit_prophet(df_prophet: pd.DataFrame) -> Prophet:
+def fit_prophet(
+    df_prophet: pd.DataFrame,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    init: dict | None = None,
+) -> Prophet:
     """
     Fit Prophet on df with columns:
       - ds: datetime64[ns] (naive)
       - y : float
+
+    uncertainty_samples=0 skips posterior sampling at predict time (about
+    half of predict cost); yhat is unchanged but there are no intervals.
+
+    init (see stan_init) warm-starts the optimizer from an earlier fit's
+    parameters; if Stan rejects it (e.g. a different changepoint count) the
+    model is refitted cold.
     """
     required = {"ds", "y"}
     if not required.issubset(df_prophet.columns):
@@ -138,16 +275,109 @@ def fit_prophet(df_prophet: pd.DataFrame) -> Prophet:
     if len(df_prophet) < 96:
         raise ValueError(f"Not enough rows to train Prophet (got {len(df_prophet)}, need at least 96).")
 
-    model = Prophet(
-        daily_seasonality=True,
-        weekly_seasonality=True,
-        yearly_seasonality=False,
-        interval_width=0.9,
-    )
+    def _new_model() -> Prophet:
+        return Prophet(
+            daily_seasonality=True,
+            weekly_seasonality=True,
+            yearly_seasonality=False,
+            interval_width=0.9,
+            uncertainty_samples=uncertainty_samples,
+        )
+
+    if init is not None:
+        model = _new_model()
+        try:
+            model.fit(df_prophet, init=init)
+            return model
+        except Exception as e:
+            # a Prophet object can only be fit once, so start over with a new one
+            print(f"[forecast] Warm start rejected, fitting cold: {e!r}")
+
+    model = _new_model()
     model.fit(df_prophet)
     return model
 
 
+def stan_init(model: Prophet) -> dict:
+    """
+    A fitted model's parameters in the form Prophet.fit(init=...) takes,
+    for warm-starting the next fit on a shifted window.
+    """
+    res = {}
+    for pname in ["k", "m", "sigma_obs"]:
+        res[pname] = float(model.params[pname][0][0])
+    for pname in ["delta", "beta"]:
+        res[pname] = np.asarray(model.params[pname][0]).tolist()
+    return res
+
+
+# ---------------------------------------------------------------------
+# 3b. Fitted-model cache (skip re-fits on repeat runs)
+# ---------------------------------------------------------------------
+def _model_cache_path(
+    df_prophet: pd.DataFrame,
+    metric_code: str,
+    as_of_day: date,
+    train_days: int,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+) -> Path:
+    """
+    Cache file for a fit. The key includes a hash of the training frame, so a
+    re-promoted day (changed history) never reuses a stale model.
+    """
+    data_hash = hashlib.blake2b(
+        pd.util.hash_pandas_object(df_prophet, index=False).values.tobytes()
+    ).hexdigest()[:16]
+    return MODEL_CACHE_DIR / (
+        f"{metric_code}_{as_of_day.isoformat()}_{train_days}_u{uncertainty_samples}_{data_hash}.json"
+    )
+
+
+def fit_prophet_cached(
+    df_prophet: pd.DataFrame,
+    cache_path: Path,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    init: dict | None = None,
+) -> Prophet:
+    """
+    Load a fitted model from cache_path if present, else fit_prophet() and save it.
+    init only affects a fresh fit (a warm start lands on the same optimum).
+
+    Uses Prophet's JSON serialization (stable across Python/pickle versions).
+    An unreadable cache file is deleted and the model refitted.
+    """
+    if cache_path.exists():
+        try:
+            return model_from_json(cache_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"[forecast] Ignoring unreadable model cache {cache_path.name}: {e!r}")
+            cache_path.unlink(missing_ok=True)
+
+    model = fit_prophet(df_prophet, uncertainty_samples=uncertainty_samples, init=init)
+
+    # write-then-rename so a concurrent reader never sees a partial file
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(model_to_json(model), encoding="utf-8")
+    os.replace(tmp_path, cache_path)
+
+    _prune_model_cache()
+
+    return model
+
+
+def _prune_model_cache(max_age_days: int = MODEL_CACHE_MAX_AGE_DAYS) -> None:
+    # Delete cached fits older than max_age_days (each one holds its full
+    # training history, so the directory would otherwise only grow)
+    cutoff = time.time() - max_age_days * 86400
+    for path in MODEL_CACHE_DIR.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass  # another worker got there first
+
+
 # ---------------------------------------------------------------------
 # 4. Forecast helpers
 # ---------------------------------------------------------------------
@@ -155,38 +385,68 @@ def _build_next_96_steps_from_training(df_prophet: pd.DataFrame) -> pd.DataFrame
     """
     Build 96 x 15-min steps starting immediately after last training timestamp.
     """
-    last_ds = df_prophet["ds"].max()
+    return _build_next_96_steps_after(df_prophet["ds"].max())
+
+
+def _build_next_96_steps_after(last_ds: pd.Timestamp) -> pd.DataFrame:
+    """
+    Build 96 x 15-min steps starting immediately after last_ds (naive UTC).
+    """
     start = last_ds + timedelta(minutes=15)
     future_ds = pd.date_range(start=start, periods=96, freq="15min")
     return pd.DataFrame({"ds": future_ds})
 
 
+def _predict(model: Prophet, df_future: pd.DataFrame) -> pd.DataFrame:
+    """model.predict; without uncertainty sampling the bounds collapse onto yhat."""
+    forecast = model.predict(df_future)
+    if not model.uncertainty_samples:
+        forecast["yhat_lower"] = forecast["yhat"]
+        forecast["yhat_upper"] = forecast["yhat"]
+    return forecast
+
+
+def _finalize_forecast(fc: pd.DataFrame, metric_code: str, model_name: str | None = None) -> pd.DataFrame:
+    """
+    Shared post-processing for Prophet and fallback output: one new frame
+    (no copy-then-mutate) with ds, the YHAT_COLS clipped at 0 as float32 in a
+    single pass over the value block, metric_code and (optionally) model_name.
+    """
+    vals = np.maximum(fc[YHAT_COLS].to_numpy(dtype=np.float32), 0.0)
+
+    out = pd.DataFrame({"ds": fc["ds"].to_numpy()})
+    for i, col in enumerate(YHAT_COLS):
+        out[col] = vals[:, i]
+    out["metric_code"] = metric_code
+    if model_name is not None:
+        out["model_name"] = model_name
+
+    return out
+
+
 def forecast_next_day_for_metric(
     metric_code: str,
     train_days: int,
     *,
     as_of_day: date | None = None,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    downsample_old: bool = True,
 ) -> pd.DataFrame:
     """
     Prophet-only next-day forecast (96 x 15-min steps).
 
     If as_of_day is provided, training ends on that day and forecast is for as_of_day+1.
+    With uncertainty_samples=0, yhat_lower/yhat_upper equal yhat.
     """
     df_history = load_metric_history_for_prophet(metric_code, train_days, as_of_day=as_of_day)
-    df_prophet = to_prophet_frame(df_history)
+    df_prophet = to_prophet_frame(df_history, downsample_old=downsample_old)
 
-    model = fit_prophet(df_prophet)
+    model = fit_prophet(df_prophet, uncertainty_samples=uncertainty_samples)
     df_future = _build_next_96_steps_from_training(df_prophet)
 
-    forecast = model.predict(df_future)
-
-    result = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
-    result["metric_code"] = metric_code
-
-    for col in ["yhat", "yhat_lower", "yhat_upper"]:
-        result[col] = result[col].clip(lower=0.0)
+    forecast = _predict(model, df_future)
 
-    return result
+    return _finalize_forecast(forecast, metric_code)
 
 
 # ---------------------------------------------------------------------
@@ -199,48 +459,147 @@ def forecast_next_day_for_metric_robust(
     as_of_day: date | None = None,
     max_retries: int = 2,
     retry_sleep_seconds: float = 0.5,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    df_future: pd.DataFrame | None = None,
+    downsample_old: bool = True,
 ) -> pd.DataFrame:
     """
     Attempts Prophet forecast. If it fails after retries, uses fallback_slot_median_next_day.
 
+    uncertainty_samples=0 skips Prophet's interval sampling (yhat_lower/yhat_upper = yhat).
+    df_future (column ds) fixes the forecast steps; by default the 96 steps
+    after the last training timestamp.
+    downsample_old=False fits on full 15-min history (see to_prophet_frame).
+
     Returns columns:
       ds, yhat, yhat_lower, yhat_upper, metric_code, model_name
     """
+    if as_of_day is None:
+        as_of_day = get_latest_complete_local_day()
+
     df_history = load_metric_history_for_prophet(metric_code, train_days, as_of_day=as_of_day)
-    df_prophet = to_prophet_frame(df_history)
 
-    last_err: Exception | None = None
+    return forecast_next_day_for_metric_robust_from_frame(
+        df_history,
+        metric_code,
+        train_days,
+        as_of_day=as_of_day,
+        max_retries=max_retries,
+        retry_sleep_seconds=retry_sleep_seconds,
+        uncertainty_samples=uncertainty_samples,
+        df_future=df_future,
+        downsample_old=downsample_old,
+    )
 
-    for attempt in range(max_retries + 1):
+
+def forecast_next_day_for_metric_robust_from_frame(
+    df_history: pd.DataFrame,
+    metric_code: str,
+    train_days: int,
+    *,
+    as_of_day: date,
+    max_retries: int = 2,
+    retry_sleep_seconds: float = 0.5,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    df_future: pd.DataFrame | None = None,
+    downsample_old: bool = True,
+    init: dict | None = None,
+) -> pd.DataFrame:
+    """
+    forecast_next_day_for_metric_robust on an already-loaded history frame
+    (as returned by load_metric_history_for_prophet for the same
+    metric_code / train_days / as_of_day).
+
+    init warm-starts the Prophet fit (see fit_prophet / stan_init).
+    """
+    fc, _, _ = _forecast_from_frame_with_params(
+        df_history,
+        metric_code,
+        train_days,
+        as_of_day=as_of_day,
+        max_retries=max_retries,
+        retry_sleep_seconds=retry_sleep_seconds,
+        uncertainty_samples=uncertainty_samples,
+        df_future=df_future,
+        downsample_old=downsample_old,
+        init=init,
+    )
+    return fc
+
+
+def _forecast_from_frame_with_params(
+    df_history: pd.DataFrame,
+    metric_code: str,
+    train_days: int,
+    *,
+    as_of_day: date,
+    max_retries: int = 2,
+    retry_sleep_seconds: float = 0.5,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    df_future: pd.DataFrame | None = None,
+    downsample_old: bool = True,
+    init: dict | None = None,
+    model_json: str | None = None,
+    return_model: bool = False,
+    use_model_cache: bool = True,
+) -> tuple[pd.DataFrame, dict | None, str | None]:
+    # Returns (forecast, stan_init of the Prophet fit, model JSON if
+    # return_model). params are None when nothing was fitted (reused model or
+    # fallback). model_json: predict with this already-fitted model instead of
+    # fitting (a failure there falls through to a normal fit).
+    # use_model_cache=False fits without reading/writing MODEL_CACHE_DIR.
+    df_prophet = to_prophet_frame(df_history, downsample_old=downsample_old)
+
+    if df_future is None:
+        df_future = _build_next_96_steps_from_training(df_prophet)
+
+    if model_json is not None:
         try:
-            model = fit_prophet(df_prophet)
-            df_future = _build_next_96_steps_from_training(df_prophet)
-            forecast = model.predict(df_future)
+            forecast = _predict(model_from_json(model_json), df_future)
+            return _finalize_forecast(forecast, metric_code, "prophet_v1"), None, model_json
+        except Exception as e:
+            print(f"[forecast] Reusing fitted {metric_code} model failed, refitting: {e!r}")
 
-            out = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
-            out["metric_code"] = metric_code
-            out["model_name"] = "prophet_v1"
+    cache_path = (
+        _model_cache_path(df_prophet, metric_code, as_of_day, train_days, uncertainty_samples)
+        if use_model_cache
+        else None
+    )
 
-            for col in ["yhat", "yhat_lower", "yhat_upper"]:
-                out[col] = out[col].clip(lower=0.0)
+    last_err: Exception | None = None
 
-            return out
+    for attempt in range(max_retries + 1):
+        try:
+            if cache_path is not None:
+                model = fit_prophet_cached(df_prophet, cache_path, uncertainty_samples, init=init)
+            else:
+                model = fit_prophet(df_prophet, uncertainty_samples=uncertainty_samples, init=init)
+            forecast = _predict(model, df_future)
+            fc = _finalize_forecast(forecast, metric_code, "prophet_v1")
 
         except Exception as e:
             last_err = e
+            # don't let a bad cached model poison the retries
+            if cache_path is not None:
+                cache_path.unlink(missing_ok=True)
             if attempt < max_retries:
                 time.sleep(retry_sleep_seconds * (attempt + 1))
+            continue
 
-    # Fallback forecast for the next day after last training timestamp
-    forecast_date = (df_prophet["ds"].max() + timedelta(minutes=15)).date()
-    fb = fallback_slot_median_next_day(df_prophet, forecast_date).copy()
-    fb["metric_code"] = metric_code
-    fb["model_name"] = "fallback_slot_median_v1"
+        # params only seed a later warm start: never let them cost the forecast
+        try:
+            params = stan_init(model)
+        except Exception as e:
+            print(f"[forecast] No warm-start params for {metric_code}: {e!r}")
+            params = None
+        return fc, params, model_to_json(model) if return_model else None
 
-    for col in ["yhat", "yhat_lower", "yhat_upper"]:
-        fb[col] = fb[col].clip(lower=0.0)
+    # Fallback forecast over the same steps (starts at the first future ds)
+    # (slot medians need every 15-min slot, so always the full-resolution history)
+    df_full = to_prophet_frame(df_history, downsample_old=False) if downsample_old else df_prophet
+    fb = fallback_slot_median_next_day(df_full, df_future["ds"].iloc[0])
 
-    required_out = {"ds", "yhat", "yhat_lower", "yhat_upper", "metric_code", "model_name"}
+    required_out = {"ds", *YHAT_COLS}
     if not required_out.issubset(fb.columns):
         missing = required_out - set(fb.columns)
         raise ValueError(
@@ -248,37 +607,157 @@ def forecast_next_day_for_metric_robust(
             f"Original Prophet error was: {last_err!r}"
         )
 
-    return fb
+    return _finalize_forecast(fb, metric_code, "fallback_slot_median_v1"), None, None
 
 
 # ---------------------------------------------------------------------
 # 5. Multi-metric runner
 # ---------------------------------------------------------------------
+
+# Worker pool for the per-metric fits, created on first use and reused, so
+# repeated calls (e.g. a backfill loop) don't pay process start-up + the
+# prophet import for every day.
+_FORECAST_POOL: ProcessPoolExecutor | None = None
+_FORECAST_POOL_WORKERS = 0
+
+
+def _prewarm_worker() -> None:
+    # Runs once per worker: load Prophet's Stan backend (prophet>=1.1 ships a
+    # precompiled CmdStan model) before the first task rather than inside it
+    Prophet()
+
+
+def _get_forecast_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _FORECAST_POOL, _FORECAST_POOL_WORKERS
+    if _FORECAST_POOL is not None and _FORECAST_POOL_WORKERS != max_workers:
+        # different size requested: replace the (idle) pool
+        _FORECAST_POOL.shutdown()
+        _FORECAST_POOL = None
+    if _FORECAST_POOL is None:
+        _FORECAST_POOL = ProcessPoolExecutor(max_workers=max_workers, initializer=_prewarm_worker)
+        _FORECAST_POOL_WORKERS = max_workers
+    return _FORECAST_POOL
+
+
 def forecast_all_metrics_next_day(
     train_days: int = 30,
     *,
     as_of_day: date | None = None,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    downsample_old: bool = True,
+    warm_start_params: dict[str, dict] | None = None,
+    max_workers: int | None = None,
 ) -> pd.DataFrame:
     """
     Run a next-day forecast for all core metrics.
 
     If as_of_day is provided, all metrics are trained ending on that day, and forecast for as_of_day+1.
+    Pass uncertainty_samples=0 when only yhat is needed (faster predict), and
+    downsample_old=False to fit on the full 15-min history.
+    warm_start_params: see forecast_all_metrics_next_day_from_histories.
+
+    The per-metric fits are independent and CPU-bound, so each runs in its own
+    worker process (processes rather than threads: keeps Stan state isolated).
+    max_workers caps the pool size (default: one worker per metric).
     """
-    metric_codes = ["wind_actual", "solar_actual", "demand_actual"]
+    # Resolve once so every worker trains on the same window
+    if as_of_day is None:
+        as_of_day = get_latest_complete_local_day()
 
-    frames: list[pd.DataFrame] = []
-    for code in metric_codes:
-        frames.append(
-            forecast_next_day_for_metric_robust(
-                metric_code=code,
-                train_days=train_days,
+    # One warehouse query for all metrics; workers get their frame pre-loaded
+    histories = _load_all_histories(METRIC_CODES, train_days, as_of_day)
+
+    return forecast_all_metrics_next_day_from_histories(
+        histories,
+        train_days,
+        as_of_day=as_of_day,
+        uncertainty_samples=uncertainty_samples,
+        downsample_old=downsample_old,
+        warm_start_params=warm_start_params,
+        max_workers=max_workers,
+    )
+
+
+def forecast_all_metrics_next_day_from_histories(
+    histories: dict[str, pd.DataFrame],
+    train_days: int,
+    *,
+    as_of_day: date,
+    uncertainty_samples: int = UNCERTAINTY_SAMPLES,
+    downsample_old: bool = True,
+    warm_start_params: dict[str, dict] | None = None,
+    max_workers: int | None = None,
+    fitted_models: dict[str, str] | None = None,
+    refit: bool = True,
+    use_model_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    forecast_all_metrics_next_day on already-loaded training histories
+    ({metric_code: frame} for as_of_day's window, e.g. from
+    slice_training_histories). Forecasts every metric in histories.
+
+    warm_start_params ({metric_code: stan_init dict}) warm-starts each
+    metric's fit and is updated in place with this run's fitted params, so a
+    caller stepping through consecutive days can pass the same dict each time.
+    Metrics that fell back keep their previous entry.
+
+    fitted_models ({metric_code: Prophet model JSON}) lets a caller skip
+    fits: with refit=True every metric is fitted and its model stored in the
+    dict; with refit=False a stored model just predicts the new steps (no
+    refit, so it ignores history added since it was fitted), and metrics
+    without one are fitted and stored.
+
+    use_model_cache=False skips the on-disk model cache (MODEL_CACHE_DIR):
+    worth it when every call trains on a new window (e.g. a backfill), where
+    the cache can never hit.
+    """
+    metric_codes = list(histories)
+
+    # Shared forecast steps after the latest training timestamp, so all
+    # metrics come back on identical ds rows (naive UTC, like to_prophet_frame)
+    last_ds = max(h["ts_utc"].max() for h in histories.values()).tz_convert(None)
+    df_future = _build_next_96_steps_after(last_ds)
+
+    global _FORECAST_POOL
+
+    frames: dict[str, pd.DataFrame] = {}
+    ex = _get_forecast_pool(max_workers or len(metric_codes))
+    try:
+        futures = {
+            ex.submit(
+                _forecast_from_frame_with_params,
+                histories[code],
+                code,
+                train_days,
                 as_of_day=as_of_day,
                 max_retries=2,
-            )
-        )
-
-    df_all = pd.concat(frames, ignore_index=True)
-    df_all = df_all.sort_values(["ds", "metric_code"]).reset_index(drop=True)
+                uncertainty_samples=uncertainty_samples,
+                df_future=df_future,
+                downsample_old=downsample_old,
+                init=warm_start_params.get(code) if warm_start_params is not None else None,
+                model_json=fitted_models.get(code) if fitted_models is not None and not refit else None,
+                return_model=fitted_models is not None,
+                use_model_cache=use_model_cache,
+            ): code
+            for code in metric_codes
+        }
+        for fut in as_completed(futures):
+            code = futures[fut]
+            frames[code], params, model_json = fut.result()
+            if warm_start_params is not None and params is not None:
+                warm_start_params[code] = params
+            if fitted_models is not None:
+                if model_json is not None:
+                    fitted_models[code] = model_json
+                elif refit:
+                    # fell back: don't let later days reuse an older model
+                    fitted_models.pop(code, None)
+    except BrokenProcessPool:
+        # a worker died; drop the pool so the next call starts a fresh one
+        _FORECAST_POOL = None
+        raise
+
+    df_all = _interleave_by_ds([frames[code] for code in sorted(metric_codes)])
 
     if "model_name" not in df_all.columns:
         df_all["model_name"] = "prophet_v1"
@@ -286,7 +765,37 @@ def forecast_all_metrics_next_day(
     return df_all
 
 
+def _interleave_by_ds(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combine per-metric frames (given in metric_code order) into one frame
+    ordered by (ds, metric_code).
+
+    When every frame has the same columns and identical ds rows (the normal
+    case: one shared df_future) the rows are interleaved by stacking the
+    column arrays, no concat + sort. Otherwise falls back to concat + sort.
+    """
+    first = frames[0]
+    ds = first["ds"].to_numpy()
+    aligned = all(
+        list(f.columns) == list(first.columns)
+        and len(f) == len(ds)
+        and (f["ds"].to_numpy() == ds).all()
+        for f in frames[1:]
+    )
+    if not aligned:
+        df_all = pd.concat(frames, ignore_index=True)
+        return df_all.sort_values(["ds", "metric_code"]).reset_index(drop=True)
+
+    # (rows, n_metrics) per column, flattened row-major → ds-major, metric-minor
+    return pd.DataFrame(
+        {col: np.stack([f[col].to_numpy() for f in frames], axis=1).reshape(-1) for col in first.columns}
+    )
+
+
 def plot_next_day_forecast_all(train_days: int = 30) -> None:
+    # Imported here so forecast worker processes never load matplotlib
+    import matplotlib.pyplot as plt
+
     df_all = forecast_all_metrics_next_day(train_days=train_days)
 
     if df_all.empty:
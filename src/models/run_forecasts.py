@@ -1,8 +1,9 @@
 from pathlib import Path
 from datetime import timedelta
+import warnings
 import pandas as pd
 
-from models.prophet_forecast import forecast_all_metrics_next_day
+from models.prophet_forecast import UNCERTAINTY_SAMPLES, forecast_all_metrics_next_day
 from warehouse.readings import get_latest_complete_local_day
 
 import argparse
@@ -12,8 +13,32 @@ import argparse
 INIT_PATH = Path(__file__)
 PROJECT_ROOT = INIT_PATH.resolve().parents[2]
 
+SNAPSHOT_FORMATS = ("parquet", "csv")
 
-def run_next_day_forecasts(train_days: int = 30, save_csv: bool = True) -> pd.DataFrame:
+
+def write_forecast_snapshot(df_forecast: pd.DataFrame, out_path: Path, output_format: str = "parquet") -> None:
+    """
+    Write a forecast frame to out_path as Parquet (zstd, metric_code /
+    model_name dictionary-encoded) or CSV.
+    """
+    if output_format == "parquet":
+        # categorical codes → dictionary-encoded columns in the file
+        cat_cols = [c for c in ("metric_code", "model_name") if c in df_forecast.columns]
+        df_out = df_forecast.astype({c: "category" for c in cat_cols})
+        df_out.to_parquet(out_path, engine="pyarrow", compression="zstd", index=False)
+    elif output_format == "csv":
+        df_forecast.to_csv(out_path, index=False)
+    else:
+        raise ValueError(f"output_format must be 'parquet' or 'csv', got {output_format!r}.")
+
+
+def run_next_day_forecasts(
+    train_days: int = 30,
+    save_snapshot: bool = True,
+    output_format: str = "parquet",
+    with_uncertainty: bool = True,
+    save_csv: bool | None = None,
+) -> pd.DataFrame:
     """
     Run next-day forecasts for ALL metrics (wind, solar, demand).
 
@@ -21,7 +46,7 @@ def run_next_day_forecasts(train_days: int = 30, save_csv: bool = True) -> pd.Da
       1. Determines the latest COMPLETE local day in the DB
       2. Generates a next-day forecast for that date
       3. Validates forecast structure
-      4. Saves a CSV (optional)
+      4. Saves the forecast file (optional; Parquet by default, or CSV)
       5. Returns the forecast DataFrame
 
     Parameters
@@ -29,8 +54,15 @@ def run_next_day_forecasts(train_days: int = 30, save_csv: bool = True) -> pd.Da
     train_days : int
         Number of historical calendar days to use for Prophet training
         Example: 30 → train on last 30 complete days
-    save_csv : bool
+    save_snapshot : bool
         Whether to write forecast output to data/processed/forecasts/
+    output_format : str
+        "parquet" (default; zstd, dictionary-encoded codes) or "csv"
+    with_uncertainty : bool
+        False skips Prophet's interval sampling (faster); yhat_lower/yhat_upper
+        then equal yhat for Prophet rows
+    save_csv : bool | None
+        Deprecated alias of save_snapshot (the file is Parquet by default)
 
     Returns
     -------
@@ -42,8 +74,13 @@ def run_next_day_forecasts(train_days: int = 30, save_csv: bool = True) -> pd.Da
     # ------------------------------------------------------------------
     # 1. Validate inputs
     # ------------------------------------------------------------------
+    if save_csv is not None:
+        warnings.warn("save_csv is deprecated; use save_snapshot.", DeprecationWarning, stacklevel=2)
+        save_snapshot = save_csv
     if train_days <= 0:
         raise ValueError("train_days must be a positive integer.")
+    if output_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"output_format must be 'parquet' or 'csv', got {output_format!r}.")
 
     # ------------------------------------------------------------------
     # 2. Determine the forecast target date
@@ -54,7 +91,11 @@ def run_next_day_forecasts(train_days: int = 30, save_csv: bool = True) -> pd.Da
     # ------------------------------------------------------------------
     # 3. Run forecasting for all metrics
     # ------------------------------------------------------------------
-    df_forecast = forecast_all_metrics_next_day(train_days=train_days)
+    df_forecast = forecast_all_metrics_next_day(
+        train_days=train_days,
+        as_of_day=latest_day,
+        uncertainty_samples=UNCERTAINTY_SAMPLES if with_uncertainty else 0,
+    )
 
     if df_forecast.empty:
         raise ValueError("Forecast function returned an empty DataFrame.")
@@ -81,18 +122,18 @@ def run_next_day_forecasts(train_days: int = 30, save_csv: bool = True) -> pd.Da
     print(f"Metrics included:         {list(metrics)}\n")
 
     # ------------------------------------------------------------------
-    # 6. Save CSV output (optional)
+    # 6. Save output (optional)
     # ------------------------------------------------------------------
-    if save_csv:
+    if save_snapshot:
         forecasts_dir = PROJECT_ROOT / "data" / "processed" / "forecasts"
         forecasts_dir.mkdir(parents=True, exist_ok=True)
 
-        filename = f"forecast_{forecast_for.isoformat()}_train{train_days}d.csv"
+        filename = f"forecast_{forecast_for.isoformat()}_train{train_days}d.{output_format}"
         out_path = forecasts_dir / filename
 
-        df_forecast.to_csv(out_path, index=False)
+        write_forecast_snapshot(df_forecast, out_path, output_format)
 
-        print(f"Saved forecast CSV → {out_path}\n")
+        print(f"Saved forecast {output_format.upper()} → {out_path}\n")
 
     # ------------------------------------------------------------------
     # 7. Return DataFrame to caller (Python, notebook, scheduler, etc.)
@@ -113,23 +154,40 @@ def main(argv: list[str] | None = None) -> None:
         help="How many past days to use for training (default = 30)."
     )
 
-    # Flag: when present, DO NOT save CSV
+    # Flag: when present, DO NOT save output
     parser.add_argument(
         "--no-save",
         action="store_true",
-        help="Run forecast but do NOT write CSV output."
+        help="Run forecast but do NOT write output file."
+    )
+
+    # Output file format, default = parquet
+    parser.add_argument(
+        "--format",
+        choices=list(SNAPSHOT_FORMATS),
+        default="parquet",
+        help="Output file format (default = parquet)."
+    )
+
+    # Flag: when present, skip Prophet uncertainty intervals (yhat only)
+    parser.add_argument(
+        "--no-uncertainty",
+        action="store_true",
+        help="Skip Prophet uncertainty sampling; yhat_lower/yhat_upper = yhat."
     )
 
     # Parse the command-line args
     args = parser.parse_args(argv)
 
     # Convert flag → function argument
-    save_csv = not args.no_save
+    save_snapshot = not args.no_save
 
     # Execute forecasting
     df = run_next_day_forecasts(
         train_days=args.train_days,
-        save_csv=save_csv,
+        save_snapshot=save_snapshot,
+        output_format=args.format,
+        with_uncertainty=not args.no_uncertainty,
     )
 
     # Show a quick preview
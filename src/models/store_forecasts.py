@@ -1,182 +1,244 @@
-import pandas as pd
+from collections import Counter
 from datetime import datetime, timezone, date
 
-from ingest.promote import get_conn
-
-
-def store_forecast_dataframe(
-    df: pd.DataFrame,
-    forecast_date: date,
-    train_days: int,
-    model_name: str = "prophet_v1",
-    region_code: str = "ALL",
-) -> dict:
-    """
-    Store a long-format next-day forecast dataframe into fact_forecasts.
-
-    Required df columns:
-      ds, yhat, yhat_lower, yhat_upper, metric_code
-
-    Optional df columns:
-      model_name (recommended), region_code
+import numpy as np
+import pandas as pd
 
-    Writes:
-      forecast_date, ts_utc, metric_code, region_code, train_days,
-      yhat, yhat_lower, yhat_upper, generated_utc, model_name
+from ingest.promote import get_conn, insert_rows_multi_values
+
+
+FORECAST_INSERT_COLUMNS = (
+    "forecast_date",
+    "ts_utc",
+    "metric_code",
+    "region_code",
+    "train_days",
+    "yhat",
+    "yhat_lower",
+    "yhat_upper",
+    "generated_utc",
+    "model_name",
+)
+
+# MW values are stored rounded to this many decimals (1 kW): forecast frames
+# carry yhat as float32, and widening that to REAL as-is would store float32
+# noise (4.1 -> 4.099999904632568)
+FORECAST_DECIMALS = 3
+
+# One DELETE for all groups: keys go into a per-connection TEMP table and
+# the row-value IN still searches the primary key on forecast_date
+DELETE_FORECAST_GROUPS_SQL = """
+    DELETE FROM fact_forecasts
+    WHERE (forecast_date, region_code, model_name, train_days) IN (
+        SELECT forecast_date, region_code, model_name, train_days FROM _del_keys
+    )
+"""
 
-    Idempotency:
-      For each distinct (forecast_date, region_code, model_name, train_days) present in df,
-      delete existing rows then insert the new batch.
-    """
 
-    # ----------------------------
-    # 1) Validate inputs
-    # ----------------------------
+def _validate_forecast_df(df: pd.DataFrame, train_days: int) -> None:
     required = {"ds", "yhat", "yhat_lower", "yhat_upper", "metric_code"}
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Forecast dataframe missing required columns: {missing}")
 
-    if not isinstance(forecast_date, date):
-        raise TypeError(f"forecast_date must be datetime.date, got {type(forecast_date)}")
-
     if not isinstance(train_days, int) or train_days <= 0:
         raise ValueError("train_days must be a positive integer.")
 
     if df.empty:
         raise ValueError("df is empty; nothing to store.")
 
-    # Domain safety: MW cannot be negative
-    for col in ("yhat", "yhat_lower", "yhat_upper"):
-        vals = pd.to_numeric(df[col], errors="raise")
-        if (vals < 0).any():
-            raise ValueError(f"{col} contains negative values; expected all >= 0.")
+    # Domain safety: MW cannot be negative (one comparison over all three columns)
+    value_cols = ["yhat", "yhat_lower", "yhat_upper"]
+    negative = (df[value_cols].to_numpy(dtype=float) < 0).any(axis=0)
+    if negative.any():
+        col = value_cols[int(negative.argmax())]
+        raise ValueError(f"{col} contains negative values; expected all >= 0.")
+
 
+def _forecast_rows_frame(
+    df: pd.DataFrame,
+    forecast_date,
+    train_days: int,
+    model_name: str,
+    region_code: str,
+    generated_utc_str: str,
+) -> pd.DataFrame:
+    """
+    Build the schema-aligned frame to write (FORECAST_INSERT_COLUMNS).
+    forecast_date is one 'YYYY-MM-DD' string or an array of them (per row).
+    """
     # ----------------------------
-    # 2) Normalise ds -> UTC ISO string ts_utc
+    # Normalise ds -> UTC ISO string ts_utc
     # ----------------------------
-    df_local = df.copy()
-
-    ds = pd.to_datetime(df_local["ds"], errors="raise")
+    # (df itself is never copied: every column below is read out as an array)
+    ds = pd.to_datetime(df["ds"], errors="raise")
     # Prophet often returns naive datetimes; treat naive as UTC.
     if getattr(ds.dt, "tz", None) is None:
         ds_utc = ds.dt.tz_localize("UTC")
     else:
         ds_utc = ds.dt.tz_convert("UTC")
 
-    df_local["ts_utc"] = ds_utc.dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-    forecast_date_str = forecast_date.isoformat()
-    generated_utc_str = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # ISO strings in one numpy pass (numpy wants naive datetime64, so drop the UTC tz)
+    ds_utc_s = ds_utc.dt.tz_localize(None).to_numpy().astype("datetime64[s]")
+    ts_utc_arr = np.char.add(np.datetime_as_string(ds_utc_s, unit="s"), "Z")
 
     # ----------------------------
-    # 3) Ensure model_name / region_code columns exist
+    # model_name / region_code: column values, blanks -> defaults
     # ----------------------------
-    if "model_name" not in df_local.columns:
-        df_local["model_name"] = model_name
-    else:
-        df_local["model_name"] = df_local["model_name"].astype(str)
-        df_local.loc[df_local["model_name"].str.strip() == "", "model_name"] = model_name
-
-    if "region_code" not in df_local.columns:
-        df_local["region_code"] = region_code
-    else:
-        df_local["region_code"] = df_local["region_code"].astype(str)
-        df_local.loc[df_local["region_code"].str.strip() == "", "region_code"] = region_code
+    def _str_col_or_default(col: str, default: str) -> np.ndarray:
+        if col not in df.columns:
+            return np.full(len(df), default, dtype=object)
+        vals = df[col].astype(str).to_numpy()
+        return np.where(np.char.strip(vals.astype(str)) == "", default, vals)
 
-    # ----------------------------
-    # 4) Build the frame we will write (schema-aligned)
-    # ----------------------------
-    df_to_write = pd.DataFrame(
+    return pd.DataFrame(
         {
-            "forecast_date": forecast_date_str,
-            "ts_utc": df_local["ts_utc"].astype(str),
-            "metric_code": df_local["metric_code"].astype(str),
-            "region_code": df_local["region_code"].astype(str),
+            "forecast_date": forecast_date,
+            "ts_utc": ts_utc_arr,
+            "metric_code": df["metric_code"].astype(str).to_numpy(),
+            "region_code": _str_col_or_default("region_code", region_code),
             "train_days": int(train_days),
-            "yhat": df_local["yhat"].astype(float),
-            "yhat_lower": df_local["yhat_lower"].astype(float),
-            "yhat_upper": df_local["yhat_upper"].astype(float),
+            "yhat": np.round(df["yhat"].to_numpy(dtype=float), FORECAST_DECIMALS),
+            "yhat_lower": np.round(df["yhat_lower"].to_numpy(dtype=float), FORECAST_DECIMALS),
+            "yhat_upper": np.round(df["yhat_upper"].to_numpy(dtype=float), FORECAST_DECIMALS),
             "generated_utc": generated_utc_str,
-            "model_name": df_local["model_name"].astype(str),
+            "model_name": _str_col_or_default("model_name", model_name),
         }
     )
 
-    # ----------------------------
-    # 5) Delete + Insert (idempotent per present group)
-    # ----------------------------
-    delete_sql = """
-        DELETE FROM fact_forecasts
-        WHERE forecast_date = ?
-          AND region_code = ?
-          AND model_name = ?
-          AND train_days = ?
-    """
 
-    insert_sql = """
-        INSERT INTO fact_forecasts (
-            forecast_date,
-            ts_utc,
-            metric_code,
-            region_code,
-            train_days,
-            yhat,
-            yhat_lower,
-            yhat_upper,
-            generated_utc,
-            model_name
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+def _replace_forecast_groups(df_to_write: pd.DataFrame) -> int:
+    """
+    In one transaction: delete every (forecast_date, region_code, model_name,
+    train_days) group present in df_to_write, then insert its rows.
+    Returns the number of groups replaced.
     """
-
     # distinct delete groups based on what we are about to write
-    delete_groups = (
-        df_to_write[["region_code", "model_name"]]
+    delete_keys = list(
+        df_to_write[["forecast_date", "region_code", "model_name", "train_days"]]
         .drop_duplicates()
         .itertuples(index=False, name=None)
     )
 
     # rows to insert
-    rows = df_to_write[
-        [
-            "forecast_date",
-            "ts_utc",
-            "metric_code",
-            "region_code",
-            "train_days",
-            "yhat",
-            "yhat_lower",
-            "yhat_upper",
-            "generated_utc",
-            "model_name",
-        ]
-    ].itertuples(index=False, name=None)
+    rows = df_to_write[list(FORECAST_INSERT_COLUMNS)].itertuples(index=False, name=None)
 
     with get_conn() as conn:
         cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE;")
+
+        # Delete every (forecast_date, region_code, model_name, train_days) group
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS _del_keys (
+                forecast_date TEXT,
+                region_code   TEXT,
+                model_name    TEXT,
+                train_days    INTEGER
+            );
+        """)
+        cur.execute("DELETE FROM _del_keys;")
+        cur.executemany("INSERT INTO _del_keys VALUES (?, ?, ?, ?);", delete_keys)
+        cur.execute(DELETE_FORECAST_GROUPS_SQL)
+
+        # Insert (multi-row VALUES statements, a few hundred rows each)
+        insert_rows_multi_values(cur, "fact_forecasts", FORECAST_INSERT_COLUMNS, rows)
+        conn.commit()
 
-        # Delete per (forecast_date, region_code, model_name, train_days)
-        for (rc, mn) in delete_groups:
-            cur.execute(delete_sql, (forecast_date_str, rc, mn, int(train_days)))
+    return len(delete_keys)
 
-        # Insert
-        cur.executemany(insert_sql, rows)
-        conn.commit()
 
-    # Summarise model usage stored
-    model_counts = (
-        df_to_write.groupby(["metric_code", "model_name"])
-        .size()
-        .sort_values(ascending=False)
-        .to_dict()
+def _model_usage(df_to_write: pd.DataFrame) -> dict:
+    return dict(Counter(zip(df_to_write["metric_code"], df_to_write["model_name"])).most_common())
+
+
+def store_forecast_dataframe(
+    df: pd.DataFrame,
+    forecast_date: date,
+    train_days: int,
+    model_name: str = "prophet_v1",
+    region_code: str = "ALL",
+    return_summary: bool = False,
+) -> dict:
+    """
+    Store a long-format next-day forecast dataframe into fact_forecasts.
+
+    Required df columns:
+      ds, yhat, yhat_lower, yhat_upper, metric_code
+
+    Optional df columns:
+      model_name (recommended), region_code
+
+    Writes:
+      forecast_date, ts_utc, metric_code, region_code, train_days,
+      yhat, yhat_lower, yhat_upper, generated_utc, model_name
+
+    Idempotency:
+      For each distinct (forecast_date, region_code, model_name, train_days) present in df,
+      delete existing rows then insert the new batch.
+
+    Returns a small summary dict; its "model_usage" counts per
+    (metric_code, model_name) are only computed when return_summary=True
+    (None otherwise).
+    """
+    _validate_forecast_df(df, train_days)
+    if not isinstance(forecast_date, date):
+        raise TypeError(f"forecast_date must be datetime.date, got {type(forecast_date)}")
+
+    forecast_date_str = forecast_date.isoformat()
+    generated_utc_str = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    df_to_write = _forecast_rows_frame(
+        df, forecast_date_str, train_days, model_name, region_code, generated_utc_str
     )
+    _replace_forecast_groups(df_to_write)
 
     return {
         "forecast_date": forecast_date_str,
         "train_days": int(train_days),
         "rows_deleted_then_inserted": int(len(df_to_write)),
         "generated_utc": generated_utc_str,
-        "model_usage": model_counts,
+        # Summarise model usage stored (optional; kept off the write path)
+        "model_usage": _model_usage(df_to_write) if return_summary else None,
+    }
+
+
+def store_forecast_range(
+    df: pd.DataFrame,
+    train_days: int,
+    model_name: str = "prophet_v1",
+    region_code: str = "ALL",
+    return_summary: bool = False,
+) -> dict:
+    """
+    store_forecast_dataframe for many forecast days at once (e.g. a backfill):
+    df carries a per-row forecast_date column (date or 'YYYY-MM-DD'), and every
+    (forecast_date, region_code, model_name, train_days) group in it is
+    replaced in a single transaction.
+
+    Returns the same summary as store_forecast_dataframe, with forecast_date
+    replaced by forecast_date_min / forecast_date_max and "groups" (the
+    number of groups replaced).
+    """
+    _validate_forecast_df(df, train_days)
+    if "forecast_date" not in df.columns:
+        raise ValueError("Forecast dataframe missing required column: 'forecast_date'")
+
+    forecast_date_arr = pd.to_datetime(df["forecast_date"], errors="raise").dt.strftime("%Y-%m-%d").to_numpy()
+    generated_utc_str = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    df_to_write = _forecast_rows_frame(
+        df, forecast_date_arr, train_days, model_name, region_code, generated_utc_str
+    )
+    groups = _replace_forecast_groups(df_to_write)
+
+    return {
+        "forecast_date_min": str(forecast_date_arr.min()),
+        "forecast_date_max": str(forecast_date_arr.max()),
+        "train_days": int(train_days),
+        "groups": groups,
+        "rows_deleted_then_inserted": int(len(df_to_write)),
+        "generated_utc": generated_utc_str,
+        "model_usage": _model_usage(df_to_write) if return_summary else None,
     }
 
 
@@ -196,6 +258,7 @@ if __name__ == "__main__":
         train_days=train_days,
         model_name="prophet_v1_test",
         region_code="ALL",
+        return_summary=True,
     )
 
     print("Storage summary:")
@@ -5,7 +5,8 @@ Backfill utility for a sliding window ending yesterday (Europe/Dublin local day)
 
 Modes:
 A) ETL-only (default):
-   - Runs run_daily_pipeline(day) for each day in the window -> populates fact_readings
+   - Runs the daily pipeline's steps (stage_day, promote_staged_day) for each
+     day in the window -> populates fact_readings
 
 B) ETL + Forecasts (--with-forecasts):
    - After ETL, generates day-ahead forecasts for each "as_of_day" in the window:
@@ -14,33 +15,54 @@ B) ETL + Forecasts (--with-forecasts):
      Training data MUST end at as_of_day (to avoid leakage).
 
 Notes:
-- Forecast storage uses store_forecast_dataframe (idempotent delete-then-insert).
-- If forecasting outputs multiple model_name values (prophet + fallback), we store per-model batch.
+- Forecast storage uses store_forecast_range: all days in one idempotent
+  delete-then-insert, per (forecast_date, model_name) group (prophet + fallback mix).
 """
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Iterator
 from datetime import date, timedelta
 import argparse
 
-from pipeline.daily_runner import run_daily_pipeline, get_yesterday_local
+import pandas as pd
+
+from ingest.init_views import refresh_materialized_views
+from ingest.fetch_data import DEFAULT_AREAS, FETCH_MAX_WORKERS
+from ingest.promote import fact_complete_days, get_conn, shared_conn
+from pipeline.daily_runner import get_yesterday_local, promote_staged_day, stage_day
 from warehouse.readings import get_latest_complete_local_day
 
-from models.prophet_forecast import forecast_all_metrics_next_day
-from models.store_forecasts import store_forecast_dataframe
+from models.prophet_forecast import (
+    forecast_all_metrics_next_day_from_histories,
+    load_histories_for_range,
+    slice_training_histories,
+)
+from models.store_forecasts import store_forecast_range
+
+# --retrain-every default for the CLI: refit weekly. backfill_forecasts_for_range
+# itself defaults to 1 (refit daily) so Python callers only opt in explicitly.
+DEFAULT_RETRAIN_EVERY = 7
 
 
-def date_range_generator(start_date: date, end_date: date) -> list[date]:
-    """Return a list of dates from start_date to end_date inclusive."""
-    dates: list[date] = []
+def date_range_generator(start_date: date, end_date: date) -> Iterator[date]:
+    """Yield the dates from start_date to end_date inclusive."""
     next_day = start_date
     while next_day <= end_date:
-        dates.append(next_day)
+        yield next_day
         next_day += timedelta(days=1)
-    return dates
 
 
-def backfill_range(days: int) -> dict:
+def _fetch_day_safe(day: date) -> tuple[int | None, Exception | None]:
+    # fetch + stage one day; errors are returned so one bad day doesn't stop the rest
+    try:
+        return stage_day(day), None
+    except Exception as e:
+        return None, e
+
+
+def backfill_range(days: int, max_workers: int = FETCH_MAX_WORKERS, force: bool = False) -> dict:
     """
     Run the daily pipeline for a sliding window of days ending at yesterday.
 
@@ -48,9 +70,19 @@ def backfill_range(days: int) -> dict:
       days = 5, yesterday = 2025-12-08
       → runs for 2025-12-04, 05, 06, 07, 08
 
+    Same steps as run_daily_pipeline per day (its stage_day and
+    promote_staged_day), split in two phases:
+      1) fetch + stage: days run concurrently in max_workers threads
+         (network-bound; the request rate is still capped by fetch_data.BUCKET)
+      2) promote: serially on one connection (one SQLite writer)
+
+    Days already complete in fact_readings (every slot of every metric
+    non-NULL) are skipped unless force=True.
+
     Returns a summary dict with:
       - days_attempted
       - days_succeeded
+      - days_skipped  (already complete, not re-run)
       - rows_by_day   (date -> rows_inserted)
       - rows_total
     """
@@ -61,32 +93,52 @@ def backfill_range(days: int) -> dict:
 
     end_date = get_yesterday_local()
     start_date = end_date - timedelta(days=days - 1)
-    dates = date_range_generator(start_date, end_date)
+    # materialised: fetched in phase 1, then walked again to promote
+    dates = list(date_range_generator(start_date, end_date))
+
+    # Skip days whose readings are already complete (one coverage query)
+    skipped: list[date] = []
+    if not force:
+        with get_conn() as conn:
+            complete = fact_complete_days(conn, dates, series_per_slot=len(DEFAULT_AREAS))
+        skipped = [d for d in dates if d in complete]
+        dates = [d for d in dates if d not in complete]
+        if skipped:
+            print(f"[backfill] {len(skipped)} day(s) already complete, skipping (use --force to re-run)")
 
     days_attempted = 0
     days_succeeded = 0
     rows_total = 0
     rows_by_day: dict[date, int] = {}
 
-    for day in dates:
-        days_attempted += 1
-        try:
-            rows = run_daily_pipeline(day)
-            if rows is None:
-                rows = 0
+    # Phase 1: fetch + stage (concurrent)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        staged = dict(zip(dates, ex.map(_fetch_day_safe, dates)))
 
-            rows_by_day[day] = int(rows)
-            rows_total += int(rows)
-            days_succeeded += 1
+    # Phase 2: promote (serial, single writer)
+    with get_conn() as conn:
+        for day in dates:
+            days_attempted += 1
+            rows_staged, fetch_err = staged[day]
+            try:
+                if fetch_err is not None:
+                    raise fetch_err
 
-            print(f"[backfill] {day} → inserted {rows} rows")
-        except Exception as e:
-            print(f"[backfill] ERROR on {day}: {e}")
-            continue
+                rows = promote_staged_day(day, rows_staged, conn=conn)
+
+                rows_by_day[day] = int(rows)
+                rows_total += int(rows)
+                days_succeeded += 1
+
+                print(f"[backfill] {day} → inserted {rows} rows")
+            except Exception as e:
+                print(f"[backfill] ERROR on {day}: {e}")
+                continue
 
     return {
         "days_attempted": days_attempted,
         "days_succeeded": days_succeeded,
+        "days_skipped": len(skipped),
         "rows_by_day": rows_by_day,
         "rows_total": rows_total,
         "start_date": start_date,
@@ -100,14 +152,22 @@ def backfill_forecasts_for_range(
     forecast_train_days: int,
     region_code: str = "ALL",
     default_model_name: str = "prophet_v1",
+    retrain_every: int = 1,
 ) -> dict:
     """
     Generate day-ahead forecasts for each as_of_day in [start_date, end_date].
 
+    retrain_every=N refits the models only on every Nth day (the first day
+    included); the days in between predict with the last fitted models,
+    which don't see the newer history. About N times fewer fits for some
+    accuracy; 1 (default) refits every day. The CLI defaults to
+    DEFAULT_RETRAIN_EVERY (7).
+
     For each as_of_day D:
       - Train using data ending at D (inclusive)
       - Forecast next day (D+1) (96 x 15-min steps per metric)
-      - Store into fact_forecasts (idempotent)
+    then store every day's forecast into fact_forecasts in one transaction
+    (idempotent). If that write fails, every forecast day counts as failed.
 
     Returns a summary dict.
     """
@@ -117,6 +177,8 @@ def backfill_forecasts_for_range(
         raise ValueError("region_code must be a non-empty string.")
     if not isinstance(default_model_name, str) or not default_model_name.strip():
         raise ValueError("default_model_name must be a non-empty string.")
+    if not isinstance(retrain_every, int) or retrain_every <= 0:
+        raise ValueError("retrain_every must be a positive integer.")
 
     region_code = region_code.strip()
     default_model_name = default_model_name.strip()
@@ -140,16 +202,42 @@ def backfill_forecasts_for_range(
             "  Forecast backfill can still run, but training windows may be shorter than expected."
         )
 
-    for as_of_day in days:
+    # Read every training window in one go (consecutive as_of_days share
+    # forecast_train_days - 1 days of history); each day slices its own window
+    bulk_history = load_histories_for_range(forecast_train_days, start_date, end_date)
+
+    # Each day's window is the previous one shifted by a day, so start each
+    # Prophet fit from the previous day's fitted params (filled in per metric
+    # by the forecaster)
+    warm_start_params: dict[str, dict] = {}
+
+    # Fitted models (JSON per metric) reused between retrain days
+    fitted_models: dict[str, str] | None = {} if retrain_every > 1 else None
+
+    # per-(forecast_date, model_name) batches, written together after the loop.
+    # Two as_of_days can infer the same forecast_date (ds is UTC, so around
+    # the IST switch a forecast can start on as_of_day itself): like the old
+    # per-day delete-then-insert, the later day's batch replaces the earlier.
+    batches: dict[tuple[date, str], pd.DataFrame] = {}
+    forecast_days: list[date] = []
+
+    for idx, as_of_day in enumerate(days):
         forecasts_attempted += 1
         try:
             print(f"[backfill_forecasts] as_of_day={as_of_day} → forecasting next day...")
 
-            # IMPORTANT: This call MUST train only up to as_of_day (no leakage).
-            # Your models.prophet_forecast.forecast_all_metrics_next_day must support as_of_day.
-            df_forecast = forecast_all_metrics_next_day(
-                train_days=forecast_train_days,
+            # IMPORTANT: training must end at as_of_day (no leakage); the slice
+            # holds only rows up to the end of as_of_day.
+            histories = slice_training_histories(bulk_history, forecast_train_days, as_of_day)
+            df_forecast = forecast_all_metrics_next_day_from_histories(
+                histories,
+                forecast_train_days,
                 as_of_day=as_of_day,
+                warm_start_params=warm_start_params,
+                fitted_models=fitted_models,
+                refit=idx % retrain_every == 0,
+                # every day is a new window: the model cache could never hit
+                use_model_cache=False,
             )
 
             if df_forecast is None or df_forecast.empty:
@@ -162,32 +250,18 @@ def backfill_forecasts_for_range(
 
             # Infer forecast_date from df['ds'] (should all be the same next-day)
             forecast_date = df_forecast["ds"].min().date()
+            df_forecast["forecast_date"] = forecast_date
 
-            # Store per model_name batch (supports prophet + fallback mix)
-            batches_for_day = 0
-            rows_for_day = 0
-
-            for model_name, df_model in df_forecast.groupby("model_name", dropna=False):
-                model_name_str = str(model_name)
-
-                s = store_forecast_dataframe(
-                    df=df_model,
-                    forecast_date=forecast_date,
-                    train_days=forecast_train_days,
-                    model_name=model_name_str,
-                    region_code=region_code,
-                )
-                summaries.append(s)
-                batches_for_day += 1
-                rows_for_day += int(s.get("rows_deleted_then_inserted", 0))
-
-            stored_batches_total += batches_for_day
-            stored_rows_total += rows_for_day
-            forecasts_succeeded += 1
+            # per model_name batch (supports prophet + fallback mix);
+            # plain array masks — only a couple of distinct names per day
+            model_names = df_forecast["model_name"].to_numpy()
+            for model_name in pd.unique(model_names):
+                batches[(forecast_date, str(model_name))] = df_forecast[model_names == model_name]
+            forecast_days.append(as_of_day)
 
             print(
                 f"[backfill_forecasts] OK as_of_day={as_of_day} "
-                f"(forecast_date={forecast_date}) batches={batches_for_day} rows={rows_for_day}"
+                f"(forecast_date={forecast_date}) rows={len(df_forecast)}"
             )
 
         except Exception as e:
@@ -196,6 +270,29 @@ def backfill_forecasts_for_range(
             print(f"[backfill_forecasts] ERROR as_of_day={as_of_day}: {msg}")
             continue
 
+    # Store all days at once: one DELETE over the (forecast_date, model_name)
+    # groups and one multi-row INSERT, in a single transaction
+    if batches:
+        try:
+            s = store_forecast_range(
+                pd.concat(batches.values(), ignore_index=True),
+                train_days=forecast_train_days,
+                model_name=default_model_name,
+                region_code=region_code,
+            )
+            summaries.append(s)
+            stored_batches_total = s["groups"]
+            stored_rows_total = s["rows_deleted_then_inserted"]
+            forecasts_succeeded = len(forecast_days)
+            print(
+                f"[backfill_forecasts] Stored {stored_rows_total} rows for "
+                f"{s['forecast_date_min']} → {s['forecast_date_max']} (groups={stored_batches_total})"
+            )
+        except Exception as e:
+            msg = f"store failed: {e}"
+            failures.extend({"as_of_day": d.isoformat(), "error": msg} for d in forecast_days)
+            print(f"[backfill_forecasts] ERROR storing forecasts: {e}")
+
     return {
         "forecasts_attempted": forecasts_attempted,
         "forecasts_succeeded": forecasts_succeeded,
@@ -208,6 +305,44 @@ def backfill_forecasts_for_range(
     }
 
 
+def _run_backfill(args: argparse.Namespace) -> None:
+    print(f"[backfill] Starting ETL backfill for last {args.days} days (ending yesterday)...")
+    etl_summary = backfill_range(days=args.days, force=args.force)
+    print("\n[backfill] ETL summary:")
+    print(etl_summary)
+
+    if args.with_forecasts:
+        start_date = etl_summary["start_date"]
+        end_date = etl_summary["end_date"]
+
+        print(
+            "\n[backfill_forecasts] Starting forecast backfill...\n"
+            f"  as_of_day range:      {start_date} → {end_date}\n"
+            f"  forecast_train_days:  {args.forecast_train_days}\n"
+            f"  region_code:          {args.region_code}\n"
+        )
+
+        forecast_summary = backfill_forecasts_for_range(
+            start_date=start_date,
+            end_date=end_date,
+            forecast_train_days=args.forecast_train_days,
+            region_code=args.region_code,
+            default_model_name=args.default_model_name,
+            retrain_every=args.retrain_every,
+        )
+
+        print("\n[backfill_forecasts] Forecast summary:")
+        print(forecast_summary)
+
+    # One rebuild of the forecast-vs-actual snapshot for the whole backfill
+    try:
+        with get_conn() as conn:
+            refresh_materialized_views(conn)
+        print("[backfill] Refreshed mat_forecast_vs_actual_all.")
+    except Exception as e:
+        print(f"[backfill] WARNING: refreshing mat_forecast_vs_actual_all failed: {e}")
+
+
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Backfill ETL (and optionally forecasts) over a sliding window.")
     parser.add_argument(
@@ -216,6 +351,11 @@ def main(argv: list[str] | None = None) -> None:
         default=30,
         help="How many days to backfill ending yesterday (default = 30).",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run ETL even for days already complete in fact_readings.",
+    )
     parser.add_argument(
         "--with-forecasts",
         action="store_true",
@@ -227,6 +367,13 @@ def main(argv: list[str] | None = None) -> None:
         default=60,
         help="Training window length used for each backfilled forecast (default = 60).",
     )
+    parser.add_argument(
+        "--retrain-every",
+        type=int,
+        default=DEFAULT_RETRAIN_EVERY,
+        help="Refit the forecast models every N days, reusing them in between "
+             f"(default = {DEFAULT_RETRAIN_EVERY}; 1 = refit daily, most accurate).",
+    )
     parser.add_argument(
         "--region-code",
         type=str,
@@ -242,32 +389,10 @@ def main(argv: list[str] | None = None) -> None:
 
     args = parser.parse_args(argv)
 
-    print(f"[backfill] Starting ETL backfill for last {args.days} days (ending yesterday)...")
-    etl_summary = backfill_range(days=args.days)
-    print("\n[backfill] ETL summary:")
-    print(etl_summary)
-
-    if args.with_forecasts:
-        start_date = etl_summary["start_date"]
-        end_date = etl_summary["end_date"]
-
-        print(
-            "\n[backfill_forecasts] Starting forecast backfill...\n"
-            f"  as_of_day range:      {start_date} → {end_date}\n"
-            f"  forecast_train_days:  {args.forecast_train_days}\n"
-            f"  region_code:          {args.region_code}\n"
-        )
-
-        forecast_summary = backfill_forecasts_for_range(
-            start_date=start_date,
-            end_date=end_date,
-            forecast_train_days=args.forecast_train_days,
-            region_code=args.region_code,
-            default_model_name=args.default_model_name,
-        )
-
-        print("\n[backfill_forecasts] Forecast summary:")
-        print(forecast_summary)
+    # One connection for every get_conn() on this thread for the whole run
+    # (fetch threads and worker processes still open their own)
+    with shared_conn():
+        _run_backfill(args)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ Orchestration entry point for the DAILY automated job:
 1) Run ETL for yesterday (Europe/Dublin local day) -> stage + promote into fact_readings
 2) Generate next-day forecasts for all metrics using a sliding training window
 3) Store forecasts into fact_forecasts (idempotent: delete-then-insert)
-4) Optionally export a CSV snapshot to data/processed/forecasts/
+4) Optionally export a forecast snapshot (Parquet, or CSV) to data/processed/forecasts/
 5) Export dashboard-ready Parquet dataset(s) for Power BI (forecast vs actual)
 
 This is the script you schedule via Windows Task Scheduler.
@@ -19,6 +19,7 @@ from datetime import date, timedelta
 from pathlib import Path
 import argparse
 import logging
+import warnings
 
 import pandas as pd
 
@@ -26,6 +27,9 @@ from pipeline.daily_runner import run_daily_pipeline, get_yesterday_local
 from warehouse.readings import get_latest_complete_local_day
 from models.prophet_forecast import forecast_all_metrics_next_day
 from models.store_forecasts import store_forecast_dataframe
+from models.run_forecasts import SNAPSHOT_FORMATS, write_forecast_snapshot
+from ingest.init_views import refresh_materialized_views
+from ingest.promote import get_conn
 
 # NEW: dashboard parquet exporter
 from dashboard.export_dashboard_parquet import export_demand_forecast_vs_actual_parquet
@@ -56,9 +60,15 @@ class DailyForecastResult:
     region_code: str
     forecast_rows: int
     models_used: list[str]
-    csv_path: str | None
+    snapshot_path: str | None  # forecast snapshot file (Parquet or CSV, see output_format)
     dashboard_parquet_path: str | None
 
+    @property
+    def csv_path(self) -> str | None:
+        # Deprecated name of snapshot_path (the file is Parquet by default)
+        warnings.warn("csv_path is deprecated; use snapshot_path.", DeprecationWarning, stacklevel=2)
+        return self.snapshot_path
+
 
 def _ensure_forecast_has_model_name(df: pd.DataFrame, default_model_name: str) -> pd.DataFrame:
     """
@@ -103,31 +113,44 @@ def _infer_forecast_date_from_df(df: pd.DataFrame) -> date:
 
 def run_daily_forecast_pipeline(
     train_days: int = 60,
-    save_csv: bool = True,
+    save_snapshot: bool = True,
     default_model_name: str = "prophet_v1",
     region_code: str = "ALL",
     export_dashboard: bool = True,
+    max_workers: int | None = None,
+    output_format: str = "parquet",
+    save_csv: bool | None = None,
 ) -> DailyForecastResult:
     """
     Run the end-to-end daily job:
       - ETL yesterday into fact_readings
       - Forecast next day
       - Store into fact_forecasts
-      - Optionally export CSV
+      - Optionally export a forecast snapshot (output_format "parquet" or "csv")
       - Optionally export dashboard Parquet (forecast vs actual)
 
+    max_workers caps the worker processes fitting the metrics in parallel
+    (default: one per metric). save_csv is a deprecated alias of save_snapshot.
+
     Returns a structured summary for logging/CLI output.
     """
 
     # -----------------------------
     # 1) Validate inputs
     # -----------------------------
+    if save_csv is not None:
+        warnings.warn("save_csv is deprecated; use save_snapshot.", DeprecationWarning, stacklevel=2)
+        save_snapshot = save_csv
     if not isinstance(train_days, int) or train_days <= 0:
         raise ValueError("train_days must be a positive integer.")
     if not isinstance(default_model_name, str) or not default_model_name.strip():
         raise ValueError("default_model_name must be a non-empty string.")
     if not isinstance(region_code, str) or not region_code.strip():
         raise ValueError("region_code must be a non-empty string.")
+    if max_workers is not None and (not isinstance(max_workers, int) or max_workers <= 0):
+        raise ValueError("max_workers must be a positive integer.")
+    if output_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"output_format must be 'parquet' or 'csv', got {output_format!r}.")
 
     default_model_name = default_model_name.strip()
     region_code = region_code.strip()
@@ -154,7 +177,12 @@ def run_daily_forecast_pipeline(
     # -----------------------------
     # 4) Generate forecast dataframe
     # -----------------------------
-    df_forecast = forecast_all_metrics_next_day(train_days=train_days)
+    # pass the day resolved above so the forecaster doesn't re-query it
+    df_forecast = forecast_all_metrics_next_day(
+        train_days=train_days,
+        as_of_day=latest_complete,
+        max_workers=max_workers,
+    )
 
     if df_forecast is None or not isinstance(df_forecast, pd.DataFrame):
         raise ValueError("Forecast function did not return a DataFrame.")
@@ -188,16 +216,19 @@ def run_daily_forecast_pipeline(
     # -----------------------------
     # If forecasts contain multiple model_name values (e.g., prophet + fallback),
     # store them per-model so delete-then-insert remains correct.
+    # model_name is already str here, so a plain array mask per name does the split.
     storage_summaries: list[dict] = []
-    for model_name, df_model in df_forecast.groupby("model_name", dropna=False):
-        model_name_str = str(model_name)
+    model_names = df_forecast["model_name"].to_numpy()
+    for model_name in models_used:
+        df_model = df_forecast[model_names == model_name]
 
         summary = store_forecast_dataframe(
             df=df_model,
             forecast_date=forecast_date,
             train_days=train_days,
-            model_name=model_name_str,
+            model_name=model_name,
             region_code=region_code,
+            return_summary=True,  # model usage is printed below
         )
         storage_summaries.append(summary)
 
@@ -205,20 +236,31 @@ def run_daily_forecast_pipeline(
     for s in storage_summaries:
         print(f"  - {s}")
 
+    # Rebuild the forecast-vs-actual snapshot once, now that today's readings
+    # and forecasts are both in (the dashboard export only reads it)
+    snapshot_refreshed = False
+    try:
+        with get_conn() as conn:
+            refresh_materialized_views(conn)
+        snapshot_refreshed = True
+        print("[daily_forecast] Refreshed mat_forecast_vs_actual_all.")
+    except Exception as e:
+        print(f"[daily_forecast] WARNING: refreshing mat_forecast_vs_actual_all failed: {e}")
+
     # -----------------------------
-    # 6) Optional CSV export
+    # 6) Optional snapshot export (Parquet by default)
     # -----------------------------
-    csv_path: str | None = None
-    if save_csv:
+    snapshot_path: str | None = None
+    if save_snapshot:
         forecasts_dir = PROJECT_ROOT / "data" / "processed" / "forecasts"
         forecasts_dir.mkdir(parents=True, exist_ok=True)
 
-        filename = f"forecast_{forecast_date.isoformat()}_train{train_days}d.csv"
+        filename = f"forecast_{forecast_date.isoformat()}_train{train_days}d.{output_format}"
         out_path = forecasts_dir / filename
 
-        df_forecast.to_csv(out_path, index=False)
-        csv_path = str(out_path)
-        print(f"[daily_forecast] Saved CSV → {csv_path}")
+        write_forecast_snapshot(df_forecast, out_path, output_format)
+        snapshot_path = str(out_path)
+        print(f"[daily_forecast] Saved {output_format.upper()} → {snapshot_path}")
 
     # -----------------------------
     # 7) Dashboard Parquet export (Power BI source)
@@ -227,7 +269,8 @@ def run_daily_forecast_pipeline(
     if export_dashboard:
         try:
             # NOTE: exporter currently creates demand_forecast_vs_actual.parquet
-            export_summary = export_demand_forecast_vs_actual_parquet()
+            # no second rebuild if the snapshot was refreshed after storing (step 5)
+            export_summary = export_demand_forecast_vs_actual_parquet(refresh=not snapshot_refreshed)
             dashboard_parquet_path = str(export_summary.get("out_path")) if export_summary else None
             if export_summary:
                 print(
@@ -253,7 +296,7 @@ def run_daily_forecast_pipeline(
         region_code=region_code,
         forecast_rows=forecast_rows,
         models_used=models_used,
-        csv_path=csv_path,
+        snapshot_path=snapshot_path,
         dashboard_parquet_path=dashboard_parquet_path,
     )
 
@@ -271,7 +314,13 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument(
         "--no-save",
         action="store_true",
-        help="Run pipeline but do NOT write CSV output.",
+        help="Run pipeline but do NOT write the forecast snapshot file.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(SNAPSHOT_FORMATS),
+        default="parquet",
+        help="Forecast snapshot file format (default = parquet).",
     )
     parser.add_argument(
         "--default-model-name",
@@ -290,15 +339,23 @@ def main(argv: list[str] | None = None) -> None:
         action="store_true",
         help="Do NOT export dashboard Parquet output (Power BI source).",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Worker processes for the per-metric model fits (default = one per metric).",
+    )
 
     args = parser.parse_args(argv)
 
     result = run_daily_forecast_pipeline(
         train_days=args.train_days,
-        save_csv=not args.no_save,
+        save_snapshot=not args.no_save,
         default_model_name=args.default_model_name,
         region_code=args.region_code,
         export_dashboard=not args.no_dashboard_export,
+        max_workers=args.max_workers,
+        output_format=args.format,
     )
 
     print("\n[daily_forecast] DONE")
@@ -5,6 +5,7 @@ from pathlib import Path
 import argparse
 
 from ingest.fetch_data import fetch_one_day, DEFAULT_AREAS
+from ingest.init_views import refresh_materialized_views
 from ingest.promote import get_conn, promote_day_delete_insert
 
 # ---------------------------------------------------------------------
@@ -27,6 +28,30 @@ def get_yesterday_local(tz: ZoneInfo = TZ_DUBLIN):
     yesterday_local = today_local - timedelta(days=1)
     return yesterday_local
 
+def stage_day(daily_date: date) -> int:
+    """
+    Fetch + stage step of the daily pipeline: pull the day's readings for
+    DEFAULT_AREAS into stg_readings. Returns the number of rows staged.
+    """
+    return fetch_one_day(daily_date, DEFAULT_AREAS)
+
+
+def promote_staged_day(daily_date: date, rows_staged: int, conn=None) -> int:
+    """
+    Promote step of the daily pipeline: replace the day's fact_readings rows
+    with its canonical staging slice (skipped when nothing was staged).
+    Uses conn if given, otherwise opens a connection only when there is
+    something to promote. Returns the number of rows inserted.
+    """
+    if rows_staged == 0:
+        print(f"No rows staged for {daily_date}, skipping promotion.")
+        return 0
+    if conn is None:
+        with get_conn() as conn:
+            return promote_day_delete_insert(conn, daily_date)
+    return promote_day_delete_insert(conn, daily_date)
+
+
 def run_daily_pipeline(daily_date: date | None = None):
     """
     Run the daily ETL pipeline for a given local Dublin date.
@@ -43,15 +68,10 @@ def run_daily_pipeline(daily_date: date | None = None):
     print(f"Running daily pipeline for {daily_date}...")
 
     # 2. Fetch + stage
-    rows_staged = fetch_one_day(daily_date, DEFAULT_AREAS)
-
-    if rows_staged == 0:
-        print(f"No rows staged for {daily_date}, skipping promotion.")
-        return 0
+    rows_staged = stage_day(daily_date)
 
-    # 3. Promote canonical slice
-    with get_conn() as conn:
-        rows_inserted = promote_day_delete_insert(conn, daily_date)
+    # 3. Promote canonical slice (skipped if nothing was staged)
+    rows_inserted = promote_staged_day(daily_date, rows_staged)
 
     print(f"Inserted {rows_inserted} canonical rows into fact_readings.")
     print("Pipeline complete.")
@@ -78,6 +98,12 @@ def main(argv: list[str] | None = None):
             raise SystemExit(f"Invalid --day value: '{args.day}'. Use YYYY-MM-DD.")
         run_daily_pipeline(day_local)
 
+    # New actuals change the forecast-vs-actual snapshot the dashboard reads
+    try:
+        with get_conn() as conn:
+            refresh_materialized_views(conn)
+    except Exception as e:
+        print(f"WARNING: refreshing mat_forecast_vs_actual_all failed: {e}")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,20 @@
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta, datetime, timezone
 import pandas as pd
 from zoneinfo import ZoneInfo
 from ingest.promote import get_conn, get_dim_maps
 
+# Reads filter and return fact_readings.ts_epoch (integer seconds, generated
+# from ts_utc) as "ts_utc"; read_sql turns it into UTC timestamps in one
+# vectorised pass, no string parsing.
+TS_UTC_PARSE = {"ts_utc": {"unit": "s", "utc": True}}
+
+
+def _day_epoch_bounds(start_date: date, end_date: date) -> tuple[int, int]:
+    # [start_date 00:00Z, end_date+1 00:00Z) as epoch seconds
+    start = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc)
+    end = datetime(end_date.year, end_date.month, end_date.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return int(start.timestamp()), int(end.timestamp())
+
 
 def get_metric_series(metric_code:str, start_date: date, end_date: date):
     if not isinstance(metric_code, str):
@@ -12,16 +24,15 @@ def get_metric_series(metric_code:str, start_date: date, end_date: date):
     if not isinstance(end_date, date):
         raise TypeError("end_date must be a date")
 
-    start_utc = f"{start_date.isoformat()}T00:00:00Z"
-    end_utc = f"{(end_date + timedelta(days=1)).isoformat()}T00:00:00Z"
+    start_epoch, end_epoch = _day_epoch_bounds(start_date, end_date)
 
     sql = """
-           SELECT ts_utc, value, metric_id, region_id
+           SELECT ts_epoch AS ts_utc, value, metric_id, region_id
            FROM fact_readings
-           WHERE metric_id = ? 
-           AND ts_utc >= ? 
-           AND ts_utc < ?
-           ORDER BY ts_utc;
+           WHERE metric_id = ?
+           AND ts_epoch >= ?
+           AND ts_epoch < ?
+           ORDER BY ts_epoch;
        """
 
     with get_conn() as conn:
@@ -31,25 +42,92 @@ def get_metric_series(metric_code:str, start_date: date, end_date: date):
 
         metric_id = metric_map[metric_code]
 
-        df = pd.read_sql(sql, conn,params=(metric_id, start_utc, end_utc))
-        df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True, errors="coerce")
-        df = df.sort_values("ts_utc").reset_index(drop=True)
+        # rows already come back in ts_utc order (ORDER BY), so no re-sort
+        df = pd.read_sql(sql, conn, params=(metric_id, start_epoch, end_epoch), parse_dates=TS_UTC_PARSE)
 
         return df
 
+def get_metrics_series_multi(metric_codes, start_date: date, end_date: date) -> dict[str, pd.DataFrame]:
+    """
+    Like get_metric_series for several metrics at once: one fact_readings
+    query (metric_id IN (...)) over the window, split per metric_code.
+
+    Returns {metric_code: frame} with the same columns/order as
+    get_metric_series; a metric with no rows maps to an empty frame.
+    """
+    metric_codes = list(metric_codes)
+    if not metric_codes or not all(isinstance(c, str) for c in metric_codes):
+        raise TypeError("metric_codes must be a non-empty sequence of strings")
+    if not isinstance(start_date, date):
+        raise TypeError("start_date must be a date")
+    if not isinstance(end_date, date):
+        raise TypeError("end_date must be a date")
+
+    start_epoch, end_epoch = _day_epoch_bounds(start_date, end_date)
+
+    with get_conn() as conn:
+        metric_map, region_map = get_dim_maps(conn)
+        unknown = [c for c in metric_codes if c not in metric_map]
+        if unknown:
+            raise ValueError(f"Unknown metric code(s): {unknown!r}")
+
+        metric_ids = [metric_map[c] for c in metric_codes]
+        sql = f"""
+            SELECT ts_epoch AS ts_utc, value, metric_id, region_id
+            FROM fact_readings
+            WHERE metric_id IN ({", ".join("?" * len(metric_ids))})
+            AND ts_epoch >= ?
+            AND ts_epoch < ?
+            ORDER BY metric_id, ts_epoch;
+        """
+
+        df = pd.read_sql(sql, conn, params=(*metric_ids, start_epoch, end_epoch), parse_dates=TS_UTC_PARSE)
+
+    # ORDER BY metric_id, ts_utc: each group is already in ts_utc order
+    by_id = {mid: g for mid, g in df.groupby("metric_id", sort=False)}
+    return {
+        code: by_id.get(metric_map[code], df.iloc[0:0]).reset_index(drop=True)
+        for code in metric_codes
+    }
+
 def get_all_metrics_wide(start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    wind/solar/demand side by side (columns ts_utc, wind_actual, solar_actual,
+    demand_actual), one row per ts_utc that has all three metrics.
+
+    One query: conditional aggregation pivots the metrics in SQLite, so there
+    is no per-metric read or pandas merge.
+    """
+    if not isinstance(start_date, date):
+        raise TypeError("start_date must be a date")
+    if not isinstance(end_date, date):
+        raise TypeError("end_date must be a date")
 
-    get_wind = get_metric_series("wind_actual", start_date, end_date)
-    get_solar = get_metric_series("solar_actual", start_date, end_date)
-    get_demand = get_metric_series("demand_actual", start_date, end_date)
+    start_epoch, end_epoch = _day_epoch_bounds(start_date, end_date)
 
-    df_wind = get_wind.rename(columns={"value": "wind_actual"}).drop(columns=["metric_id","region_id"], axis=1)
-    df_solar = get_solar.rename(columns={"value": "solar_actual"}).drop(columns=["metric_id","region_id"], axis=1)
-    df_demand = get_demand.rename(columns={"value": "demand_actual"}).drop(columns=["metric_id","region_id"], axis=1)
+    # HAVING keeps the inner-join semantics: only timestamps with all three metrics
+    sql = """
+        SELECT ts_epoch AS ts_utc,
+               MAX(CASE WHEN metric_id = ? THEN value END) AS wind_actual,
+               MAX(CASE WHEN metric_id = ? THEN value END) AS solar_actual,
+               MAX(CASE WHEN metric_id = ? THEN value END) AS demand_actual
+        FROM fact_readings
+        WHERE metric_id IN (?, ?, ?)
+        AND ts_epoch >= ?
+        AND ts_epoch < ?
+        GROUP BY ts_epoch
+        HAVING COUNT(DISTINCT metric_id) = 3
+        ORDER BY ts_epoch;
+    """
 
-    join_df =df_wind.merge(df_solar, on=["ts_utc"]).merge(df_demand, on=["ts_utc"])
+    with get_conn() as conn:
+        metric_map, region_map = get_dim_maps(conn)
+        metric_ids = [metric_map[c] for c in ("wind_actual", "solar_actual", "demand_actual")]
+
+        df = pd.read_sql(sql, conn, params=(*metric_ids, *metric_ids, start_epoch, end_epoch),
+                         parse_dates=TS_UTC_PARSE)
 
-    return join_df
+    return df
 
 def get_latest_complete_local_day(tz: ZoneInfo = ZoneInfo("Europe/Dublin")) -> date:
     """
@@ -60,22 +138,19 @@ def get_latest_complete_local_day(tz: ZoneInfo = ZoneInfo("Europe/Dublin")) -> d
     This is used to find the most recent complete day that has been
     promoted into fact_readings.
     """
-    sql = "SELECT MAX(ts_utc) FROM fact_readings;"
+    # ORDER BY ts_utc walks ix_fact_ts from the end (MAX(ts_epoch) would scan)
+    sql = "SELECT ts_epoch FROM fact_readings ORDER BY ts_utc DESC LIMIT 1;"
 
     with get_conn() as conn:
         row = conn.execute(sql).fetchone()
 
-    max_ts_str = row[0]
-
-    if max_ts_str is None:
+    if row is None:
         raise RuntimeError(
             "No rows found in fact_readings; "
             "run the daily pipeline before calling get_latest_complete_local_day()."
         )
 
-    # ts_utc is stored as TEXT like "2025-10-24T22:45:00Z"
-    # datetime.fromisoformat understands "+00:00" better than "Z"
-    ts_utc = datetime.fromisoformat(max_ts_str.replace("Z", "+00:00"))
+    ts_utc = datetime.fromtimestamp(row[0], tz=timezone.utc)
 
     # Convert to local timezone and take the date component
     ts_local = ts_utc.astimezone(tz)